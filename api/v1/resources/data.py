@@ -1,11 +1,12 @@
 import http
 
 from celery.result import AsyncResult
-from fastapi import APIRouter, Depends
-from starlette.responses import FileResponse, JSONResponse, Response
+from fastapi import APIRouter, Depends, Request
+from starlette.responses import FileResponse, Response
 
-from api.v1.schemas.service import TestDataBase
+from api.v1.schemas.service import CountersRepairBase, DataLoadBase, TestDataBase
 from celery_worker import data_to_excel_task
+from core.responses import FastJSONResponse
 from services.data_service import DataService, get_data_service
 
 router = APIRouter()
@@ -24,6 +25,34 @@ async def fill_db_with_test_data(
     return await test_data_service.fill_db_with_test_data()
 
 
+@router.post(
+    path="/upload",
+    summary="Load menus from JSON or XLSX file sent as request body",
+    tags=["data"],
+    response_model=DataLoadBase,
+    status_code=http.HTTPStatus.CREATED,
+)
+async def upload_data(
+    request: Request,
+    test_data_service: DataService = Depends(get_data_service),
+):
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    return await test_data_service.upload(media_type, request.stream())
+
+
+@router.post(
+    path="/counters",
+    summary="Repair menus and submenus counters",
+    tags=["data"],
+    response_model=CountersRepairBase,
+    status_code=http.HTTPStatus.OK,
+)
+async def repair_counters(
+    test_data_service: DataService = Depends(get_data_service),
+):
+    return await test_data_service.repair_counters()
+
+
 @router.post(
     path="/tasks",
     summary="Create convert data to excel task",
@@ -32,7 +61,7 @@ async def fill_db_with_test_data(
 )
 async def create_convert_task():
     task = data_to_excel_task.delay()
-    return JSONResponse({"task_id": task.id})
+    return FastJSONResponse({"task_id": task.id})
 
 
 @router.get(
@@ -50,7 +79,7 @@ async def get_task_status(task_id: str) -> Response:
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
 
-    result = JSONResponse(
+    result = FastJSONResponse(
         {
             "task_id": task_id,
             "task_status": task_result.status,
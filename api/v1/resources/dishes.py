@@ -1,11 +1,23 @@
 import http
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Query
 from pydantic.types import UUID
 
-from api.v1.schemas.dishes import DishBase, DishDetail, DishList, DishUpdate
+from api.v1.schemas.dishes import (
+    DishBase,
+    DishBatchUpdate,
+    DishDetail,
+    DishList,
+    DishUpdate,
+)
 from api.v1.schemas.service import DeleteBase
+from core.config import get_settings
+from core.responses import CachedJSONResponse
 from services.dish_service import DishService, get_dish_service
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -34,9 +46,17 @@ async def create_dish(
 async def list_dish(
     menu_id: UUID,
     submenu_id: UUID,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
     dish_service: DishService = Depends(get_dish_service),
 ):
-    return await dish_service.get_list(menu_id, submenu_id)
+    dishes, next_cursor = await dish_service.get_list(
+        menu_id, submenu_id, limit, cursor
+    )
+    response = CachedJSONResponse(dishes)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get(
@@ -51,7 +71,9 @@ async def get_dish(
     dish_id: UUID,
     dish_service: DishService = Depends(get_dish_service),
 ):
-    return await dish_service.get_detail(menu_id, submenu_id, dish_id)
+    return CachedJSONResponse(
+        await dish_service.get_detail(menu_id, submenu_id, dish_id)
+    )
 
 
 @router.patch(
@@ -83,3 +105,50 @@ async def delete_dish(
     dish_service: DishService = Depends(get_dish_service),
 ):
     return await dish_service.delete(menu_id, submenu_id, dish_id)
+
+
+@router.post(
+    path=":batch",
+    summary="Create dishes",
+    response_model=DishList,
+    status_code=http.HTTPStatus.CREATED,
+)
+async def create_dish_batch(
+    menu_id: UUID,
+    submenu_id: UUID,
+    dishes: list[DishBase] = Body(..., min_items=1, max_items=settings.BATCH_MAX_SIZE),
+    dish_service: DishService = Depends(get_dish_service),
+):
+    return await dish_service.create_batch(dishes, menu_id, submenu_id)
+
+
+@router.patch(
+    path=":batch",
+    summary="Update dishes",
+    response_model=DishList,
+    status_code=http.HTTPStatus.OK,
+)
+async def update_dish_batch(
+    menu_id: UUID,
+    submenu_id: UUID,
+    dishes: list[DishBatchUpdate] = Body(
+        ..., min_items=1, max_items=settings.BATCH_MAX_SIZE
+    ),
+    dish_service: DishService = Depends(get_dish_service),
+):
+    return await dish_service.update_batch(menu_id, submenu_id, dishes)
+
+
+@router.delete(
+    path=":batch",
+    summary="Delete dishes",
+    response_model=DeleteBase,
+    status_code=http.HTTPStatus.OK,
+)
+async def delete_dish_batch(
+    menu_id: UUID,
+    submenu_id: UUID,
+    dish_ids: list[UUID] = Body(..., min_items=1, max_items=settings.BATCH_MAX_SIZE),
+    dish_service: DishService = Depends(get_dish_service),
+):
+    return await dish_service.delete_batch(menu_id, submenu_id, dish_ids)
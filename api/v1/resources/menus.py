@@ -1,11 +1,21 @@
 import http
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from pydantic.types import UUID
 
-from api.v1.schemas.menus import MenuBase, MenuCreate, MenuDetail, MenuList, MenuUpdate
+from api.v1.schemas.menus import (
+    MenuBase,
+    MenuCreate,
+    MenuDetail,
+    MenuList,
+    MenuTree,
+    MenuUpdate,
+)
 from api.v1.schemas.service import DeleteBase
+from core.responses import CachedJSONResponse
 from services.menu_service import MenuService, get_menu_service
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
@@ -30,8 +40,16 @@ async def create_menu(
     response_model=MenuList,
     status_code=http.HTTPStatus.OK,
 )
-async def list_menu(menu_service: MenuService = Depends(get_menu_service)):
-    return await menu_service.get_list()
+async def list_menu(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    menu_service: MenuService = Depends(get_menu_service),
+):
+    menus, next_cursor = await menu_service.get_list(limit, cursor)
+    response = CachedJSONResponse(menus)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get(
@@ -45,7 +63,21 @@ async def get_menu(
     menu_id: UUID,
     menu_service: MenuService = Depends(get_menu_service),
 ):
-    return await menu_service.get_detail(menu_id)
+    return CachedJSONResponse(await menu_service.get_detail(menu_id))
+
+
+@router.get(
+    path="/{menu_id}/tree",
+    summary="Menu with its submenus and dishes",
+    tags=["menus"],
+    response_model=MenuTree,
+    status_code=http.HTTPStatus.OK,
+)
+async def get_menu_tree(
+    menu_id: UUID,
+    menu_service: MenuService = Depends(get_menu_service),
+):
+    return CachedJSONResponse(await menu_service.get_tree(menu_id))
 
 
 @router.patch(
@@ -0,0 +1,34 @@
+import http
+
+from fastapi import APIRouter, Depends
+
+from db.cache.base import AbstractCache
+from db.cache.RedisCache import get_redis_cache
+from db.db import get_pool_stats, get_replica_pool_stats
+from db.uow import get_uow_stats
+
+router = APIRouter()
+
+
+@router.get(
+    path="/cache",
+    summary="Cache hit/miss, stored size and connection pool metrics",
+    tags=["metrics"],
+    status_code=http.HTTPStatus.OK,
+)
+async def cache_metrics(cache: AbstractCache = Depends(get_redis_cache)):
+    return cache.stats()
+
+
+@router.get(
+    path="/db",
+    summary="Database connection pools and unit of work timings",
+    tags=["metrics"],
+    status_code=http.HTTPStatus.OK,
+)
+async def db_metrics():
+    return {
+        "pool": get_pool_stats(),
+        "replica_pools": get_replica_pool_stats(),
+        "unit_of_work": get_uow_stats(),
+    }
@@ -1,18 +1,25 @@
 import http
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Query
 from pydantic.types import UUID
 
 from api.v1.schemas.service import DeleteBase
 from api.v1.schemas.submenus import (
     SubmenuBase,
+    SubmenuBatchUpdate,
     SubmenuCreate,
     SubmenuDetail,
     SubmenuList,
     SubmenuUpdate,
 )
+from core.config import get_settings
+from core.responses import CachedJSONResponse
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from services.submenu_service import SubmenuService, get_submenu_service
 
+settings = get_settings()
+
 router = APIRouter()
 
 
@@ -40,9 +47,15 @@ async def create_submenu(
 )
 async def list_submenu(
     menu_id: UUID,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
     submenu_service: SubmenuService = Depends(get_submenu_service),
 ):
-    return await submenu_service.get_list(menu_id)
+    submenus, next_cursor = await submenu_service.get_list(menu_id, limit, cursor)
+    response = CachedJSONResponse(submenus)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get(
@@ -57,7 +70,7 @@ async def get_submenu(
     submenu_id: UUID,
     submenu_service: SubmenuService = Depends(get_submenu_service),
 ):
-    return await submenu_service.get_detail(menu_id, submenu_id)
+    return CachedJSONResponse(await submenu_service.get_detail(menu_id, submenu_id))
 
 
 @router.patch(
@@ -89,3 +102,52 @@ async def delete_submenu(
     submenu_service: SubmenuService = Depends(get_submenu_service),
 ):
     return await submenu_service.delete(menu_id, submenu_id)
+
+
+@router.post(
+    path=":batch",
+    summary="Create submenus",
+    tags=["submenus"],
+    response_model=SubmenuList,
+    status_code=http.HTTPStatus.CREATED,
+)
+async def create_submenu_batch(
+    menu_id: UUID,
+    submenus: list[SubmenuBase] = Body(
+        ..., min_items=1, max_items=settings.BATCH_MAX_SIZE
+    ),
+    submenu_service: SubmenuService = Depends(get_submenu_service),
+):
+    return await submenu_service.create_batch(submenus, menu_id)
+
+
+@router.patch(
+    path=":batch",
+    summary="Update submenus",
+    tags=["submenus"],
+    response_model=SubmenuList,
+    status_code=http.HTTPStatus.OK,
+)
+async def update_submenu_batch(
+    menu_id: UUID,
+    submenus: list[SubmenuBatchUpdate] = Body(
+        ..., min_items=1, max_items=settings.BATCH_MAX_SIZE
+    ),
+    submenu_service: SubmenuService = Depends(get_submenu_service),
+):
+    return await submenu_service.update_batch(menu_id, submenus)
+
+
+@router.delete(
+    path=":batch",
+    summary="Delete submenus with their dishes",
+    tags=["submenus"],
+    response_model=DeleteBase,
+    status_code=http.HTTPStatus.OK,
+)
+async def delete_submenu_batch(
+    menu_id: UUID,
+    submenu_ids: list[UUID] = Body(..., min_items=1, max_items=settings.BATCH_MAX_SIZE),
+    submenu_service: SubmenuService = Depends(get_submenu_service),
+):
+    return await submenu_service.delete_batch(menu_id, submenu_ids)
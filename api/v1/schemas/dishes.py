@@ -10,6 +10,8 @@ class DishBase(BaseModel):
     price: str
 
     class Config:
+        # Built from repository rows, see db.repositories.rows
+        orm_mode = True
         schema_extra = {
             "example": {
                 "title": "My dish 1",
@@ -73,3 +75,15 @@ class DishUpdate(BaseModel):
                 "price": "12.55",
             },
         }
+
+
+class DishBatchUpdate(DishUpdate):
+    id: UUID
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0",
+                "price": "12.55",
+            },
+        }
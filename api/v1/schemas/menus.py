@@ -3,12 +3,16 @@ from typing import Optional
 from pydantic import BaseModel
 from pydantic.types import UUID
 
+from api.v1.schemas.submenus import SubmenuTree
+
 
 class MenuBase(BaseModel):
     title: str
     description: str
 
     class Config:
+        # Built from repository rows, see db.repositories.rows
+        orm_mode = True
         schema_extra = {
             "example": {
                 "title": "My menu 1",
@@ -46,6 +50,37 @@ class MenuDetail(MenuCreate):
         }
 
 
+class MenuTree(MenuDetail):
+    submenus: list[SubmenuTree]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0",
+                "title": "My detailed menu 1",
+                "description": "My detailed menu description 1",
+                "submenus_count": 1,
+                "dishes_count": 1,
+                "submenus": [
+                    {
+                        "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a1",
+                        "title": "My detailed submenu 1",
+                        "description": "My detailed submenu description 1",
+                        "dishes_count": 1,
+                        "dishes": [
+                            {
+                                "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a2",
+                                "title": "My dish 1",
+                                "description": "My dish description 1",
+                                "price": "12.50",
+                            },
+                        ],
+                    },
+                ],
+            },
+        }
+
+
 class MenuList(BaseModel):
     __root__: list[MenuDetail]
 
@@ -21,3 +21,31 @@ class TestDataBase(BaseModel):
                 "push_test_data": "True",
             },
         }
+
+
+class CountersRepairBase(BaseModel):
+    repaired_menus: int
+    repaired_submenus: int
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "repaired_menus": 1,
+                "repaired_submenus": 2,
+            },
+        }
+
+
+class DataLoadBase(BaseModel):
+    menus: int
+    submenus: int
+    dishes: int
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "menus": 2,
+                "submenus": 4,
+                "dishes": 9,
+            },
+        }
@@ -3,12 +3,16 @@ from uuid import UUID
 
 from pydantic import BaseModel
 
+from api.v1.schemas.dishes import DishDetail
+
 
 class SubmenuBase(BaseModel):
     title: str
     description: str
 
     class Config:
+        # Built from repository rows, see db.repositories.rows
+        orm_mode = True
         schema_extra = {
             "example": {
                 "title": "My submenu 1",
@@ -44,6 +48,28 @@ class SubmenuDetail(SubmenuCreate):
         }
 
 
+class SubmenuTree(SubmenuDetail):
+    dishes: list[DishDetail]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0",
+                "title": "My detailed submenu 1",
+                "description": "My detailed submenu description 1",
+                "dishes_count": 1,
+                "dishes": [
+                    {
+                        "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a1",
+                        "title": "My dish 1",
+                        "description": "My dish description 1",
+                        "price": "12.50",
+                    },
+                ],
+            },
+        }
+
+
 class SubmenuList(BaseModel):
     __root__: list[SubmenuDetail]
 
@@ -83,3 +109,15 @@ class SubmenuUpdate(BaseModel):
                 "description": "My updated submenu description 1",
             },
         }
+
+
+class SubmenuBatchUpdate(SubmenuUpdate):
+    id: UUID
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0",
+                "title": "My updated submenu 1",
+            },
+        }
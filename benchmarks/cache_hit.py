@@ -0,0 +1,60 @@
+"""
+Cache hit path of list endpoints: the cached dishes list is parsed into
+DishList, validated and encoded again by FastAPI (before) or sent as is
+with CachedJSONResponse (after). Runs in process, no database required.
+
+    python -m benchmarks.cache_hit
+"""
+import asyncio
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.v1.schemas.dishes import DishList
+from benchmarks.common import measure, report
+from core.responses import CachedJSONResponse
+
+REPEAT = 200
+DISHES = (10, 100, 1000)
+
+
+def cached_dish_list(size: int) -> str:
+    dishes = [
+        {
+            "id": uuid.uuid4(),
+            "title": f"Dish {number}",
+            "description": f"Dish description {number}",
+            "price": f"{number}.50",
+        }
+        for number in range(size)
+    ]
+    return DishList.parse_obj(dishes).json()
+
+
+async def main():
+    field = create_response_field(name="Response_list_dish", type_=DishList)
+    for size in DISHES:
+        cache_value = cached_dish_list(size)
+
+        async def parse_and_serialize():
+            content = await serialize_response(
+                field=field,
+                response_content=DishList.parse_raw(cache_value),
+                is_coroutine=True,
+            )
+            JSONResponse(content)
+
+        async def send_as_is():
+            CachedJSONResponse(cache_value)
+
+        report(
+            f"{size} dishes, parse and serialize",
+            await measure(parse_and_serialize, REPEAT),
+        )
+        report(f"{size} dishes, cached json", await measure(send_as_is, REPEAT))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Helpers shared by benchmarks.
+Benchmarks run against a scratch database given by BENCHMARK_POSTGRES_URL,
+its tables are dropped and recreated
+"""
+import os
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import models  # noqa: F401 registers tables in metadata
+
+
+def create_benchmark_engine() -> AsyncEngine:
+    return create_async_engine(os.environ["BENCHMARK_POSTGRES_URL"], future=True)
+
+
+def create_benchmark_sessionmaker(engine: AsyncEngine) -> sessionmaker:
+    return sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+async def recreate_tables(engine: AsyncEngine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+async def seed(
+    engine: AsyncEngine,
+    menus: int,
+    submenus_per_menu: int,
+    dishes_per_submenu: int,
+):
+    """
+    Fills tables with generated rows server side,
+    counters are consistent with generated rows
+    """
+    # Computed here: asyncpg can't infer types of :submenus * :dishes
+    params = {
+        "menus": menus,
+        "submenus": submenus_per_menu,
+        "dishes": dishes_per_submenu,
+        "menu_dishes": submenus_per_menu * dishes_per_submenu,
+    }
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                """
+                INSERT INTO menu (id, title, description, submenus_count, dishes_count)
+                SELECT gen_random_uuid(), 'Menu ' || m, 'Menu description ' || m,
+                       :submenus, :menu_dishes
+                FROM generate_series(1, :menus) AS m
+                """
+            ),
+            params,
+        )
+        await conn.execute(
+            text(
+                """
+                INSERT INTO submenu (id, title, description, menu_id, dishes_count)
+                SELECT gen_random_uuid(), 'Submenu ' || s, 'Submenu description ' || s,
+                       menu.id, :dishes
+                FROM menu, generate_series(1, :submenus) AS s
+                """
+            ),
+            params,
+        )
+        await conn.execute(
+            text(
+                """
+                INSERT INTO dish (id, title, description, price, submenu_id)
+                SELECT gen_random_uuid(), 'Dish ' || d, 'Dish description ' || d,
+                       (random() * 1000)::numeric(10, 2), submenu.id
+                FROM submenu, generate_series(1, :dishes) AS d
+                """
+            ),
+            params,
+        )
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE"))
+
+
+async def measure(func: Callable[[], Awaitable], repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "mean_ms": round(statistics.mean(durations), 3),
+        "p50_ms": round(durations[len(durations) // 2], 3),
+        "p95_ms": round(durations[int(len(durations) * 0.95)], 3),
+        "p99_ms": round(durations[int(len(durations) * 0.99)], 3),
+    }
+
+
+def report(name: str, stats: dict):
+    values = ", ".join(f"{key}={value}" for key, value in stats.items())
+    print(f"{name:<40} {values}")
@@ -0,0 +1,95 @@
+"""
+List and detail loads: repository rows, pydantic models and orjson dump
+against json built by Postgres (POSTGRES_JSON_READS) at 100 dishes
+per submenu.
+
+    BENCHMARK_POSTGRES_URL=postgresql+asyncpg://... python -m benchmarks.json_reads
+"""
+import asyncio
+import random
+
+from sqlalchemy import select
+
+from api.v1.schemas.dishes import DishDetail, DishList
+from api.v1.schemas.submenus import SubmenuList
+from benchmarks.common import (
+    create_benchmark_engine,
+    create_benchmark_sessionmaker,
+    measure,
+    recreate_tables,
+    report,
+    seed,
+)
+from core.encoders import dump_model
+from db.repositories.dish import DishRepository
+from db.repositories.submenu import SubmenuRepository
+from models import Dish, Submenu
+from services.pagination import pack_json_page, pack_page, paginate
+
+REPEAT = 500
+# Page size of list endpoints
+LIMIT = 100
+
+
+async def main():
+    engine = create_benchmark_engine()
+    async_session = create_benchmark_sessionmaker(engine)
+    await recreate_tables(engine)
+    await seed(engine, menus=10, submenus_per_menu=100, dishes_per_submenu=100)
+
+    async with async_session() as session:
+        submenus = (await session.execute(select(Submenu.id, Submenu.menu_id))).all()
+        dishes = (
+            await session.execute(
+                select(Dish.id, Dish.submenu_id, Submenu.menu_id).join(Submenu)
+            )
+        ).all()
+
+    async with async_session() as session:
+        submenu_repo = SubmenuRepository(session)
+        dish_repo = DishRepository(session)
+
+        async def submenus_rows():
+            _, menu_id = random.choice(submenus)
+            rows = await submenu_repo.list(menu_id, LIMIT + 1)
+            rows, next_cursor = paginate(rows, LIMIT)
+            pack_page(dump_model(SubmenuList.parse_obj(rows)), next_cursor)
+
+        async def submenus_json():
+            _, menu_id = random.choice(submenus)
+            page, last_id = await submenu_repo.list_json(menu_id, LIMIT)
+            pack_json_page(page, last_id)
+
+        async def dishes_rows():
+            submenu_id, menu_id = random.choice(submenus)
+            rows = await dish_repo.list(menu_id, submenu_id, LIMIT + 1)
+            rows, next_cursor = paginate(rows, LIMIT)
+            pack_page(dump_model(DishList.parse_obj(rows)), next_cursor)
+
+        async def dishes_json():
+            submenu_id, menu_id = random.choice(submenus)
+            page, last_id = await dish_repo.list_json(menu_id, submenu_id, LIMIT)
+            pack_json_page(page, last_id)
+
+        async def dish_rows():
+            dish_id, submenu_id, menu_id = random.choice(dishes)
+            dish = await dish_repo.get(menu_id, submenu_id, dish_id)
+            dump_model(DishDetail.from_orm(dish))
+
+        async def dish_json():
+            dish_id, submenu_id, menu_id = random.choice(dishes)
+            dish = await dish_repo.get_detail_json(menu_id, submenu_id, dish_id)
+            dish.encode()
+
+        report("submenus list, rows", await measure(submenus_rows, REPEAT))
+        report("submenus list, postgres json", await measure(submenus_json, REPEAT))
+        report("dishes list, rows", await measure(dishes_rows, REPEAT))
+        report("dishes list, postgres json", await measure(dishes_json, REPEAT))
+        report("dish detail, rows", await measure(dish_rows, REPEAT))
+        report("dish detail, postgres json", await measure(dish_json, REPEAT))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+List endpoints query latency with and without foreign key covering indexes
+at 1M dishes (100 menus x 100 submenus x 100 dishes).
+
+    BENCHMARK_POSTGRES_URL=postgresql+asyncpg://... python -m benchmarks.list_latency
+"""
+import asyncio
+import random
+
+from sqlalchemy import select, text
+
+from benchmarks.common import (
+    create_benchmark_engine,
+    create_benchmark_sessionmaker,
+    measure,
+    recreate_tables,
+    report,
+    seed,
+)
+from db.repositories.dish import DishRepository
+from db.repositories.submenu import SubmenuRepository
+from models import Submenu
+
+REPEAT = 200
+# Page size of list endpoints
+LIMIT = 100
+
+DROP_INDEXES = """
+DROP INDEX ix_submenu_menu_id;
+DROP INDEX ix_dish_submenu_id;
+"""
+CREATE_INDEXES = """
+CREATE INDEX ix_submenu_menu_id ON submenu (menu_id, id)
+    INCLUDE (title, description, dishes_count);
+CREATE INDEX ix_dish_submenu_id ON dish (submenu_id, id)
+    INCLUDE (title, description, price);
+"""
+
+
+async def run_lists(async_session, submenus: list, label: str):
+    async with async_session() as session:
+        submenu_repo = SubmenuRepository(session)
+        dish_repo = DishRepository(session)
+
+        async def list_submenus():
+            _, menu_id = random.choice(submenus)
+            await submenu_repo.list(menu_id, limit=LIMIT)
+
+        async def list_dishes():
+            submenu_id, menu_id = random.choice(submenus)
+            await dish_repo.list(menu_id, submenu_id, limit=LIMIT)
+
+        report(f"submenus list, {label}", await measure(list_submenus, REPEAT))
+        report(f"dishes list, {label}", await measure(list_dishes, REPEAT))
+
+
+async def main():
+    engine = create_benchmark_engine()
+    async_session = create_benchmark_sessionmaker(engine)
+    await recreate_tables(engine)
+    await seed(engine, menus=100, submenus_per_menu=100, dishes_per_submenu=100)
+
+    async with async_session() as session:
+        submenus = (await session.execute(select(Submenu.id, Submenu.menu_id))).all()
+
+    async with engine.begin() as conn:
+        for statement in DROP_INDEXES.split(";")[:-1]:
+            await conn.execute(text(statement))
+    await run_lists(async_session, submenus, "without FK indexes")
+
+    async with engine.begin() as conn:
+        for statement in CREATE_INDEXES.split(";")[:-1]:
+            await conn.execute(text(statement))
+        await conn.execute(text("ANALYZE"))
+    await run_lists(async_session, submenus, "with FK covering indexes")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
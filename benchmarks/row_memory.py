@@ -0,0 +1,99 @@
+"""
+Memory and allocations of listing 10k dishes: SQLModel instances
+against repository rows (db.repositories.rows), both converted
+to the DishList response.
+
+    BENCHMARK_POSTGRES_URL=postgresql+asyncpg://... python -m benchmarks.row_memory
+"""
+import asyncio
+import gc
+import tracemalloc
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+
+from api.v1.schemas.dishes import DishDetail, DishList
+from benchmarks.common import (
+    create_benchmark_engine,
+    create_benchmark_sessionmaker,
+    measure,
+    recreate_tables,
+    report,
+    seed,
+)
+from core.encoders import dump_model
+from db.repositories.dish import DishRepository
+from models import Dish, Submenu
+
+REPEAT = 20
+DISHES = 10_000
+
+
+async def trace(func: Callable[[], Awaitable]) -> dict:
+    """
+    :param func: returns objects to keep, they are counted as retained
+    :return: retained and peak memory, retained allocations
+    """
+    gc.collect()
+    tracemalloc.start()
+    # Kept alive until memory is read
+    kept = await func()
+    retained, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+    return {
+        "retained_kb": retained // 1024,
+        "peak_kb": peak // 1024,
+        "retained_blocks": sum(stat.count for stat in snapshot.statistics("filename")),
+    }
+
+
+async def main():
+    engine = create_benchmark_engine()
+    async_session = create_benchmark_sessionmaker(engine)
+    await recreate_tables(engine)
+    await seed(engine, menus=1, submenus_per_menu=1, dishes_per_submenu=DISHES)
+
+    async with async_session() as session:
+        submenu_id, menu_id = (
+            await session.execute(select(Submenu.id, Submenu.menu_id))
+        ).one()
+
+    async def models():
+        async with async_session() as session:
+            results = await session.execute(
+                select(Dish).where(Dish.submenu_id == submenu_id).order_by(Dish.id)
+            )
+            return results.scalars().all()
+
+    async def models_response():
+        dishes = await models()
+        return DishList.parse_obj([DishDetail(**dish.dict()) for dish in dishes])
+
+    async def rows():
+        async with async_session() as session:
+            return await DishRepository(session).list(menu_id, submenu_id, DISHES)
+
+    async def rows_response():
+        return DishList.parse_obj(await rows())
+
+    report("10k dishes, SQLModel instances", await trace(models))
+    report("10k dishes, rows", await trace(rows))
+    report("10k dishes response, SQLModel instances", await trace(models_response))
+    report("10k dishes response, rows", await trace(rows_response))
+
+    async def dump_models():
+        dump_model(await models_response())
+
+    async def dump_rows():
+        dump_model(await rows_response())
+
+    report("10k dishes json, SQLModel instances", await measure(dump_models, REPEAT))
+    report("10k dishes json, rows", await measure(dump_rows, REPEAT))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
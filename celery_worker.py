@@ -1,12 +1,11 @@
 import asyncio
 
 from celery import Celery
-from pyexcel import save_as
+from openpyxl import Workbook
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
 from core.config import get_settings
-from db.db import engine
+from db.db import async_session
 from db.repositories.data import DataRepository
 
 settings = get_settings()
@@ -19,12 +18,7 @@ celery = Celery(
 
 
 def create_session() -> AsyncSession:
-    session = sessionmaker(
-        engine,
-        expire_on_commit=False,
-        class_=AsyncSession,
-    )
-    return session()
+    return async_session()
 
 
 def create_filename(task_id: str) -> str:
@@ -33,43 +27,57 @@ def create_filename(task_id: str) -> str:
 
 
 async def convert_data(task_id: str) -> str:
-    data_repo = DataRepository(create_session())
-    data: dict = await data_repo.dump_data()
+    """
+    Writes catalog to xlsx file row by row: rows are streamed from db
+    and written by write-only workbook, so memory doesn't depend on catalog size
+    :param task_id:
+    :return: filename
+    """
     filename = create_filename(task_id)
-    data_to_excel: list = []
-    if data["menus"] is None:
-        save_as(array=data_to_excel, dest_file_name=filename, encoding="utf-8")
-        return filename
-
-    for menu_num, menu in enumerate(data["menus"]):
-        menu_data = menu["menu"]
-        data_to_excel.append(
-            [menu_num + 1, menu_data["title"], menu_data["description"]]
-        )
-        for submenu_num, submenu in enumerate(menu["submenus"]):
-            submenu_data = submenu["submenu"]
-            data_to_excel.append(
-                [
-                    "",
-                    submenu_num + 1,
-                    submenu_data["title"],
-                    submenu_data["description"],
-                ]
-            )
-            for dish_num, dish in enumerate(submenu["dishes"]):
-                dish_data = dish["dish"]
-                data_to_excel.append(
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+
+    menu_num = submenu_num = dish_num = 0
+    menu_id = submenu_id = None
+    async with create_session() as session:
+        data_repo = DataRepository(session)
+        async for row in data_repo.stream_rows():
+            if row.menu_id != menu_id:
+                menu_id, submenu_id = row.menu_id, None
+                menu_num += 1
+                submenu_num = 0
+                sheet.append([menu_num, row.menu_title, row.menu_description])
+            if row.submenu_id is None:
+                continue
+
+            if row.submenu_id != submenu_id:
+                submenu_id = row.submenu_id
+                submenu_num += 1
+                dish_num = 0
+                sheet.append(
                     [
                         "",
-                        "",
-                        dish_num + 1,
-                        dish_data["title"],
-                        dish_data["description"],
-                        dish_data["price"],
+                        submenu_num,
+                        row.submenu_title,
+                        row.submenu_description,
                     ]
                 )
+            if row.dish_id is None:
+                continue
+
+            dish_num += 1
+            sheet.append(
+                [
+                    "",
+                    "",
+                    dish_num,
+                    row.dish_title,
+                    row.dish_description,
+                    row.dish_price,
+                ]
+            )
 
-    save_as(array=data_to_excel, dest_file_name=filename, encoding="utf-8")
+    workbook.save(filename)
     return filename
 
 
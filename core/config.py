@@ -14,9 +14,40 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
     POSTGRES_URL: str
+    POSTGRES_ECHO: bool = False
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 20
+    POSTGRES_POOL_TIMEOUT_IN_SECONDS: float = 30
+    POSTGRES_POOL_RECYCLE_IN_SECONDS: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_STATEMENT_TIMEOUT_IN_MS: int = 30000
+    POSTGRES_READ_ONLY_AUTOCOMMIT: bool = True
+    # Transaction pooling PgBouncer in front of Postgres
+    POSTGRES_PGBOUNCER: bool = False
+    # List and detail json is built by Postgres, see json_page
+    POSTGRES_JSON_READS: bool = False
+    # Read only units go to replicas, json list in env
+    POSTGRES_REPLICA_URLS: list[str] = []
+    POSTGRES_READ_YOUR_WRITES_IN_SECONDS: int = 5
     REDIS_CACHE_EXPIRE_IN_SECONDS: int
     REDIS_HOST: str
     REDIS_PORT: int
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_IN_SECONDS: float = 5
+    REDIS_SOCKET_TIMEOUT_IN_SECONDS: float = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT_IN_SECONDS: float = 5
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAX_SIZE: int = 1024
+    CACHE_LOCAL_EXPIRE_IN_SECONDS: float = 5
+    CACHE_INVALIDATION_CHANNEL: str = "cache-invalidation"
+    CACHE_LOCK_EXPIRE_IN_SECONDS: int = 5
+    CACHE_LOCK_POLL_INTERVAL_IN_SECONDS: float = 0.05
+    CACHE_STALE_WHILE_REVALIDATE: bool = False
+    CACHE_STALE_EXPIRE_IN_SECONDS: int = 3600
+    CACHE_COMPRESSION_ENABLED: bool = True
+    CACHE_COMPRESSION_MIN_SIZE: int = 1024
+    CACHE_COMPRESSION_LEVEL: int = 1
+    BATCH_MAX_SIZE: int = 1000
     CELERY_BROKER_URL: str
     CELERY_BACKEND_URL: str
 
@@ -0,0 +1,23 @@
+from typing import Any
+
+from starlette.responses import JSONResponse, Response
+
+from core.encoders import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class of the app, see core.encoders
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CachedJSONResponse(Response):
+    """
+    Response with body serialized beforehand, e.g. taken from cache.
+    Body is sent as is, response_model is only used for docs
+    """
+
+    media_type = "application/json"
@@ -1,47 +1,270 @@
+from collections.abc import Sequence
 from typing import Optional, Union
 
-from fastapi import Depends
 from pydantic.types import UUID
 from redis.asyncio.client import Redis
+from redis.asyncio.connection import BlockingConnectionPool, Connection
 
 from core.config import Settings, get_settings
-from db.cache.base import AbstractCache
+from core.metrics import TimingStats
+from db.cache.base import AbstractCache, get_cache
+from db.cache.codecs import CacheCodec, create_codec
+
+# KEYS are triples of tag generation counter, tag set and recent write
+# marker, ARGV[1] is the marker TTL in milliseconds (0 - no marker).
+# Returns new generations
+INVALIDATE_TAGS_SCRIPT = """
+local hold = tonumber(ARGV[1])
+local generations = {}
+for i = 1, #KEYS, 3 do
+    generations[#generations + 1] = redis.call("INCR", KEYS[i])
+    local members = redis.call("SMEMBERS", KEYS[i + 1])
+    for j = 1, #members, 1000 do
+        redis.call("DEL", unpack(members, j, math.min(j + 999, #members)))
+    end
+    redis.call("DEL", KEYS[i + 1])
+    if hold > 0 then
+        redis.call("SET", KEYS[i + 2], 1, "PX", hold)
+    end
+end
+return generations
+"""
+
+# Compare-and-delete, see AbstractCache.delete_if_equals
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class MeteredConnectionPool(BlockingConnectionPool):
+    """
+    Blocking pool (waits up to ``timeout`` for a free connection instead of
+    failing) which keeps track of checkout wait time
+    """
+
+    # All connections created by the pool, set by BlockingConnectionPool.reset
+    _connections: list[Connection]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = TimingStats()
+
+    async def get_connection(self, command_name, *keys, **options):
+        with self.wait_time.measure():
+            return await super().get_connection(command_name, *keys, **options)
+
+    def stats(self) -> dict:
+        # Every checked out connection leaves an empty slot in the queue
+        in_use = self.max_connections - self.pool.qsize()
+        created = len(self._connections)
+        return {
+            "max_connections": self.max_connections,
+            "created": created,
+            "in_use": in_use,
+            "idle": max(created - in_use, 0),
+            "wait_time": self.wait_time.as_dict(),
+        }
 
 
 class CacheRedis(AbstractCache):
-    async def get(self, key: Union[str, UUID]) -> Optional[dict]:
+    def __init__(
+        self,
+        cache_instance: Redis,
+        codec: Optional[CacheCodec] = None,
+        write_hold: float = 0,
+    ):
+        """
+        :param cache_instance:
+        :param codec:
+        :param write_hold: seconds tags stay recently written after
+            invalidation, 0 disables recently_written
+        """
+        super().__init__(cache_instance, codec)
+        self.write_hold = write_hold
+        self._invalidate_tags = cache_instance.register_script(INVALIDATE_TAGS_SCRIPT)
+        self._delete_if_equals = cache_instance.register_script(DELETE_IF_EQUALS_SCRIPT)
+
+    @staticmethod
+    def generation_key(tag: str) -> str:
+        return f"gen:{tag}"
+
+    @staticmethod
+    def tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
+    @staticmethod
+    def written_key(tag: str) -> str:
+        return f"written:{tag}"
+
+    async def get(self, key: Union[str, UUID]) -> Optional[bytes]:
         key = str(key)
-        return await self.cache.get(name=key)
+        value = await self.cache.get(name=key)
+        return None if value is None else self.codec.decode(value)
 
     async def set(
         self,
         key: Union[str, UUID],
         value: Union[bytes, str],
         expire: int = get_settings().REDIS_CACHE_EXPIRE_IN_SECONDS,
+        tags: Sequence[str] = (),
+    ):
+        key = str(key)
+        value = self.codec.encode(value)
+        if not tags:
+            await self.cache.set(name=key, value=value, ex=expire)
+            return
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.set(name=key, value=value, ex=expire)
+            self._register_tags(pipe, key, tags, expire)
+            await pipe.execute()
+
+    async def set_if_not_exists(
+        self,
+        key: Union[str, UUID],
+        value: Union[bytes, str],
+        expire: int,
+    ) -> bool:
+        key = str(key)
+        return bool(await self.cache.set(name=key, value=value, ex=expire, nx=True))
+
+    async def delete_if_equals(
+        self, key: Union[str, UUID], value: Union[bytes, str]
+    ) -> bool:
+        key = str(key)
+        return bool(await self._delete_if_equals(keys=[key], args=[value]))
+
+    async def get_field(self, key: Union[str, UUID], field: str) -> Optional[bytes]:
+        key = str(key)
+        value = await self.cache.hget(name=key, key=field)
+        return None if value is None else self.codec.decode(value)
+
+    async def set_field(
+        self,
+        key: Union[str, UUID],
+        field: str,
+        value: Union[bytes, str],
+        expire: int = get_settings().REDIS_CACHE_EXPIRE_IN_SECONDS,
+        tags: Sequence[str] = (),
     ):
         key = str(key)
-        await self.cache.set(name=key, value=value, ex=expire)
+        value = self.codec.encode(value)
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.hset(name=key, key=field, value=value)
+            pipe.expire(name=key, time=expire, nx=True)
+            self._register_tags(pipe, key, tags, expire)
+            await pipe.execute()
+
+    def _register_tags(self, pipe, key: str, tags: Sequence[str], expire: int):
+        # Tag set lives as long as its latest key
+        for tag in tags:
+            pipe.sadd(self.tag_key(tag), key)
+            pipe.expire(self.tag_key(tag), expire)
+
+    async def get_generations(self, tags: Sequence[str]) -> list[int]:
+        if not tags:
+            return []
+        values = await self.cache.mget([self.generation_key(tag) for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> list[int]:
+        """
+        Runs INVALIDATE_TAGS_SCRIPT, i.e. one round trip for all tags.
+        Generations have no TTL: with a reset counter old keys
+        could be read again
+        :param tags:
+        :return: new generations in order of tags
+        """
+        keys = []
+        for tag in tags:
+            keys.append(self.generation_key(tag))
+            keys.append(self.tag_key(tag))
+            keys.append(self.written_key(tag))
+        if not keys:
+            return []
+        generations = await self._invalidate_tags(
+            keys=keys, args=[int(self.write_hold * 1000)]
+        )
+        return [int(generation) for generation in generations]
+
+    async def recently_written(self, tags: Sequence[str]) -> bool:
+        if not self.write_hold or not tags:
+            return False
+        return bool(await self.cache.exists(*map(self.written_key, tags)))
 
     async def delete(self, key: Union[str, UUID]):
         key = str(key)
         await self.cache.delete(key)
 
     async def delete_list_keys(self, keys: list[Union[str, UUID]]):
-        for key in keys:
-            key = str(key)
-            await self.delete(key)
+        """
+        Deletes all keys with one multi-key DEL, i.e. one round trip
+        :param keys:
+        :return: None
+        """
+        if keys:
+            await self.cache.delete(*(str(key) for key in keys))
+
+    async def delete_list_keys_and_publish(
+        self, keys: list[Union[str, UUID]], channel: str, message: str
+    ):
+        """
+        Deletes keys and publishes invalidation message in one pipelined call
+        :param keys:
+        :param channel:
+        :param message:
+        :return: None
+        """
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.delete(*(str(key) for key in keys))
+            pipe.publish(channel, message)
+            await pipe.execute()
+
+    def stats(self) -> dict:
+        return {
+            "pool": self.cache.connection_pool.stats(),
+            "codec": self.codec.stats(),
+        }
 
     async def close(self):
         await self.cache.close()
+        await self.cache.connection_pool.disconnect()
 
 
-async def get_redis_cache(settings: Settings = Depends(get_settings)):
-    redis_cache = CacheRedis(
-        Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=1,
-            decode_responses=True,
+def create_redis_cache(settings: Settings) -> CacheRedis:
+    """
+    Creates cache with one pooled client, shared by all requests of the worker.
+    Called once on application startup
+    :param settings:
+    :return: CacheRedis
+    """
+    pool = MeteredConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=1,
+        # Compressed values are binary
+        decode_responses=False,
+        max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT_IN_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_IN_SECONDS,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_IN_SECONDS,
+    )
+    return CacheRedis(
+        Redis(connection_pool=pool),
+        codec=create_codec(settings),
+        # Cache loads must not read replicas behind the last write
+        write_hold=(
+            settings.POSTGRES_READ_YOUR_WRITES_IN_SECONDS
+            if settings.POSTGRES_REPLICA_URLS
+            else 0
         ),
     )
+
+
+async def get_redis_cache() -> AbstractCache:
+    redis_cache = get_cache()
+    if redis_cache is None:
+        raise RuntimeError("Redis cache is not initialized, app startup is required")
     return redis_cache
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Optional, Union
+
+from pydantic.types import UUID
+from redis.exceptions import ConnectionError, TimeoutError
+
+from core.config import Settings, get_settings
+from db.cache.base import AbstractCache
+from db.cache.RedisCache import CacheRedis, create_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# Read timeout of the invalidation channel, see CacheTiered._listen
+LISTEN_POLL_IN_SECONDS = 1.0
+
+
+class LocalLRUCache:
+    """
+    Bounded in-process cache, least recently used entries are evicted first,
+    entries older than ``expire`` seconds are never returned
+    """
+
+    def __init__(self, max_size: int, expire: float):
+        self.max_size = max_size
+        self.expire = expire
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._items[key] = (time.monotonic() + self.expire, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, key: str):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class CacheTiered(AbstractCache):
+    """
+    Two tier cache: per-worker LocalLRUCache in front of CacheRedis.
+    Deletes and new tag generations are published to ``channel``,
+    so every worker drops its local copy of invalidated keys
+    and reads versioned keys of the new generation
+    """
+
+    def __init__(self, cache_instance: CacheRedis, local: LocalLRUCache, channel: str):
+        super().__init__(cache_instance)
+        self.local = local
+        self.channel = channel
+        self.hits = {"local": 0, "redis": 0}
+        self.misses = {"local": 0, "redis": 0}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: Union[str, UUID]) -> Optional[Union[bytes, str]]:
+        key = str(key)
+        if (value := self.local.get(key)) is not None:
+            self.hits["local"] += 1
+            return value
+        self.misses["local"] += 1
+
+        value = await self.cache.get(key)
+        if value is None:
+            self.misses["redis"] += 1
+            return None
+        self.hits["redis"] += 1
+        self.local.set(key, value)
+        return value
+
+    async def set(
+        self,
+        key: Union[str, UUID],
+        value: Union[bytes, str],
+        expire: int = get_settings().REDIS_CACHE_EXPIRE_IN_SECONDS,
+        tags: Sequence[str] = (),
+    ):
+        key = str(key)
+        await self.cache.set(key, value, expire, tags=tags)
+        self.local.set(key, value)
+
+    async def get_field(
+        self, key: Union[str, UUID], field: str
+    ) -> Optional[Union[bytes, str]]:
+        key = str(key)
+        fields = self.local.get(key)
+        if isinstance(fields, dict) and (value := fields.get(field)) is not None:
+            self.hits["local"] += 1
+            return value
+        self.misses["local"] += 1
+
+        value = await self.cache.get_field(key, field)
+        if value is None:
+            self.misses["redis"] += 1
+            return None
+        self.hits["redis"] += 1
+        self._set_local_field(key, field, value)
+        return value
+
+    async def set_field(
+        self,
+        key: Union[str, UUID],
+        field: str,
+        value: Union[bytes, str],
+        expire: int = get_settings().REDIS_CACHE_EXPIRE_IN_SECONDS,
+        tags: Sequence[str] = (),
+    ):
+        key = str(key)
+        await self.cache.set_field(key, field, value, expire, tags=tags)
+        self._set_local_field(key, field, value)
+
+    def _set_local_field(self, key: str, field: str, value: Union[bytes, str]):
+        # Fields share the local entry of the key and its expiry
+        fields = self.local.get(key)
+        if isinstance(fields, dict):
+            fields[field] = value
+        else:
+            self.local.set(key, {field: value})
+
+    async def set_if_not_exists(
+        self,
+        key: Union[str, UUID],
+        value: Union[bytes, str],
+        expire: int,
+    ) -> bool:
+        # Used for locks, must always reach Redis
+        return await self.cache.set_if_not_exists(key, value, expire)
+
+    async def delete_if_equals(
+        self, key: Union[str, UUID], value: Union[bytes, str]
+    ) -> bool:
+        # Locks are never stored locally, nothing to publish
+        return await self.cache.delete_if_equals(key, value)
+
+    async def get_generations(self, tags: Sequence[str]) -> list[int]:
+        # Generations are kept locally like values and updated by
+        # invalidate_tags messages, only unknown or expired ones are read
+        generations = [self.local.get(self.cache.generation_key(tag)) for tag in tags]
+        missing = [
+            tag for tag, generation in zip(tags, generations) if generation is None
+        ]
+        if not missing:
+            return generations
+        fetched = dict(zip(missing, await self.cache.get_generations(missing)))
+        return [
+            self._set_generation(tag, fetched[tag])
+            if generation is None
+            else generation
+            for tag, generation in zip(tags, generations)
+        ]
+
+    def _set_generation(self, tag: str, generation: int) -> int:
+        # Generations only grow: a read which raced with a message
+        # must not roll the local copy back
+        key = self.cache.generation_key(tag)
+        current = self.local.get(key)
+        if current is not None and current > generation:
+            generation = current
+        self.local.set(key, generation)
+        return generation
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> list[int]:
+        generations = await self.cache.invalidate_tags(tags)
+        if not generations:
+            return generations
+        changes = dict(zip(tags, generations))
+        for tag, generation in changes.items():
+            self._set_generation(tag, generation)
+        await self.cache.cache.publish(
+            self.channel, json.dumps({"generations": changes})
+        )
+        return generations
+
+    async def recently_written(self, tags: Sequence[str]) -> bool:
+        return await self.cache.recently_written(tags)
+
+    async def delete(self, key: Union[str, UUID]):
+        await self.delete_list_keys([key])
+
+    async def delete_list_keys(self, keys: list[Union[str, UUID]]):
+        names = [str(key) for key in keys]
+        if not names:
+            return
+        for name in names:
+            self.local.delete(name)
+        await self.cache.delete_list_keys_and_publish(
+            keys, self.channel, json.dumps({"keys": names})
+        )
+
+    def start_listener(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        """
+        Applies deletes and tag generations published by other workers.
+        Messages sent while disconnected are lost, so the local tier
+        is cleared after every reconnect. Messages are polled with
+        a timeout: a blocking read of a quiet channel fails after
+        the pool socket_timeout as if the connection was lost
+        """
+        while True:
+            try:
+                async with self.cache.cache.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.local.clear()
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True,
+                            timeout=LISTEN_POLL_IN_SECONDS,
+                        )
+                        if message is None:
+                            continue
+                        self._apply_message(json.loads(message["data"]))
+            except (ConnectionError, TimeoutError, OSError):
+                logger.warning("Cache invalidation channel is lost, reconnecting")
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    def _apply_message(self, message: dict):
+        for key in message.get("keys", ()):
+            self.local.delete(key)
+        for tag, generation in message.get("generations", {}).items():
+            self._set_generation(tag, generation)
+
+    def stats(self) -> dict:
+        return {
+            "local": {
+                "size": len(self.local),
+                "max_size": self.local.max_size,
+                "hits": self.hits["local"],
+                "misses": self.misses["local"],
+            },
+            "redis": {
+                "hits": self.hits["redis"],
+                "misses": self.misses["redis"],
+            },
+            **self.cache.stats(),
+        }
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.cache.close()
+
+
+def create_tiered_cache(settings: Settings) -> CacheTiered:
+    """
+    Creates two tier cache and subscribes it to invalidation messages.
+    Must be called from the running event loop (app startup)
+    :param settings:
+    :return: CacheTiered
+    """
+    tiered_cache = CacheTiered(
+        create_redis_cache(settings),
+        LocalLRUCache(
+            max_size=settings.CACHE_LOCAL_MAX_SIZE,
+            expire=settings.CACHE_LOCAL_EXPIRE_IN_SECONDS,
+        ),
+        channel=settings.CACHE_INVALIDATION_CHANNEL,
+    )
+    tiered_cache.start_listener()
+    return tiered_cache
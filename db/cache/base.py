@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Optional, Union
 
 __all__ = (
@@ -8,10 +9,14 @@ __all__ = (
 
 from pydantic.types import UUID
 
+from db.cache.codecs import CacheCodec
+
 
 class AbstractCache(ABC):
-    def __init__(self, cache_instance):
+    def __init__(self, cache_instance, codec: Optional[CacheCodec] = None):
         self.cache = cache_instance
+        # Converts values of get/set and get_field/set_field
+        self.codec = codec or CacheCodec()
 
     @abstractmethod
     def get(self, key: Union[str, UUID]):
@@ -23,7 +28,99 @@ class AbstractCache(ABC):
         key: Union[str, UUID],
         value: Union[bytes, str],
         expire: int = 600,
+        tags: Sequence[str] = (),
     ):
+        """
+        :param key:
+        :param value:
+        :param expire:
+        :param tags: tags to register the key under, see invalidate_tags
+        :return: None
+        """
+        pass
+
+    @abstractmethod
+    async def set_if_not_exists(
+        self,
+        key: Union[str, UUID],
+        value: Union[bytes, str],
+        expire: int,
+    ) -> bool:
+        """
+        Used for locks, bypasses the codec and local tiers
+        :param key:
+        :param value: lock owner token
+        :param expire:
+        :return: True if key was set
+        """
+        pass
+
+    @abstractmethod
+    async def delete_if_equals(
+        self, key: Union[str, UUID], value: Union[bytes, str]
+    ) -> bool:
+        """
+        Releases lock taken by set_if_not_exists, a lock which expired
+        and was taken by another owner is kept
+        :param key:
+        :param value: lock owner token
+        :return: True if key was deleted
+        """
+        pass
+
+    @abstractmethod
+    def get_field(self, key: Union[str, UUID], field: str):
+        pass
+
+    @abstractmethod
+    def set_field(
+        self,
+        key: Union[str, UUID],
+        field: str,
+        value: Union[bytes, str],
+        expire: int = 600,
+        tags: Sequence[str] = (),
+    ):
+        """
+        Stores value in a field of hash ``key``, deleting the key drops
+        all of its fields. Expire is set by the first field only
+        :param key:
+        :param field:
+        :param value:
+        :param expire:
+        :param tags: tags to register the key under, see invalidate_tags
+        :return: None
+        """
+        pass
+
+    @abstractmethod
+    async def get_generations(self, tags: Sequence[str]) -> list[int]:
+        """
+        Reads generations of tags in one batch, unknown tags have 0
+        :param tags:
+        :return: generations in order of tags
+        """
+        pass
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Sequence[str]) -> list[int]:
+        """
+        Increments generations of tags and deletes all keys registered
+        under them in one call. Keys built with previous generations
+        are not read anymore even if written after the call
+        :param tags:
+        :return: new generations in order of tags
+        """
+        pass
+
+    @abstractmethod
+    async def recently_written(self, tags: Sequence[str]) -> bool:
+        """
+        Whether any of tags was invalidated within the write hold window,
+        while replicas may still miss the write
+        :param tags:
+        :return: bool
+        """
         pass
 
     @abstractmethod
@@ -32,9 +129,18 @@ class AbstractCache(ABC):
 
     @abstractmethod
     def delete_list_keys(self, keys: list[Union[str, UUID]]):
+        """
+        Deletes all keys in one batch
+        :param keys:
+        :return: None
+        """
         for key in keys:
             self.delete(key)
 
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
     @abstractmethod
     def close(self):
         pass
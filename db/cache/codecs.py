@@ -0,0 +1,87 @@
+import zlib
+from typing import Union
+
+from core.config import Settings
+
+__all__ = (
+    "CacheCodec",
+    "ZlibCodec",
+    "create_codec",
+)
+
+
+class CacheCodec:
+    """
+    Converts values on their way to and from Redis and counts
+    stored bytes. Stores values as is, base class of other codecs
+    """
+
+    name = "plain"
+
+    def __init__(self):
+        self.values: int = 0
+        self.encoded: int = 0
+        self.raw_bytes: int = 0
+        self.stored_bytes: int = 0
+
+    def encode(self, value: Union[bytes, str]) -> bytes:
+        if isinstance(value, str):
+            value = value.encode()
+        stored = self._encode(value)
+        self.values += 1
+        self.encoded += stored is not value
+        self.raw_bytes += len(value)
+        self.stored_bytes += len(stored)
+        return stored
+
+    def _encode(self, value: bytes) -> bytes:
+        return value
+
+    def decode(self, value: bytes) -> bytes:
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "values": self.values,
+            "encoded": self.encoded,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "saved_bytes": self.raw_bytes - self.stored_bytes,
+        }
+
+
+class ZlibCodec(CacheCodec):
+    """
+    Compresses values of at least ``min_size`` bytes. Compressed values
+    start with a header JSON and page cursors never start with, so
+    values stored without compression are read as is
+    """
+
+    name = "zlib"
+    header = b"\x00zlib:"
+
+    def __init__(self, min_size: int, level: int):
+        super().__init__()
+        self.min_size = min_size
+        self.level = level
+
+    def _encode(self, value: bytes) -> bytes:
+        if len(value) < self.min_size:
+            return value
+        compressed = self.header + zlib.compress(value, self.level)
+        return compressed if len(compressed) < len(value) else value
+
+    def decode(self, value: bytes) -> bytes:
+        if value.startswith(self.header):
+            return zlib.decompress(value.removeprefix(self.header))
+        return value
+
+
+def create_codec(settings: Settings) -> CacheCodec:
+    if settings.CACHE_COMPRESSION_ENABLED:
+        return ZlibCodec(
+            min_size=settings.CACHE_COMPRESSION_MIN_SIZE,
+            level=settings.CACHE_COMPRESSION_LEVEL,
+        )
+    return CacheCodec()
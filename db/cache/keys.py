@@ -0,0 +1,77 @@
+from pydantic.types import UUID
+
+__all__ = (
+    "MENUS_TAG",
+    "menu_list_key",
+    "menu_key",
+    "menu_tree_key",
+    "submenu_list_key",
+    "submenu_key",
+    "dish_list_key",
+    "dish_key",
+    "menu_tag",
+    "submenu_tag",
+    "menu_tree_tag",
+)
+
+# Keys are namespaced by entity and include the whole path of the
+# resource, tags name the tree nodes cached values depend on:
+# invalidating a node tag drops everything cached under that node
+
+MENUS_TAG = "menus"
+
+
+def menu_list_key() -> str:
+    return "menu:list"
+
+
+def menu_key(menu_id: UUID) -> str:
+    return f"menu:{menu_id}"
+
+
+def menu_tree_key(menu_id: UUID) -> str:
+    return f"menu:tree:{menu_id}"
+
+
+def submenu_list_key(menu_id: UUID) -> str:
+    return f"submenu:list:{menu_id}"
+
+
+def submenu_key(menu_id: UUID, submenu_id: UUID) -> str:
+    return f"submenu:{menu_id}:{submenu_id}"
+
+
+def dish_list_key(menu_id: UUID, submenu_id: UUID) -> str:
+    return f"dish:list:{menu_id}:{submenu_id}"
+
+
+def dish_key(menu_id: UUID, submenu_id: UUID, dish_id: UUID) -> str:
+    return f"dish:{menu_id}:{submenu_id}:{dish_id}"
+
+
+def menu_tag(menu_id: UUID) -> str:
+    """
+    Menu subtree: menu itself, its submenus and dishes
+    :param menu_id:
+    :return: tag
+    """
+    return f"menu:{menu_id}"
+
+
+def submenu_tag(submenu_id: UUID) -> str:
+    """
+    Submenu subtree: submenu itself and its dishes
+    :param submenu_id:
+    :return: tag
+    """
+    return f"submenu:{submenu_id}"
+
+
+def menu_tree_tag(menu_id: UUID) -> str:
+    """
+    Menu tree response, besides menu subtree changes it depends
+    on dish updates, which only invalidate their submenu subtree
+    :param menu_id:
+    :return: tag
+    """
+    return f"menu-tree:{menu_id}"
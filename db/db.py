@@ -1,21 +1,141 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import itertools
+import uuid
+from typing import Optional
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 
 __all__ = ("get_session",)
 
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from core.config import get_settings
+from core.metrics import TimingStats
 
 settings = get_settings()
 
-engine = create_async_engine(settings.POSTGRES_URL, echo=True, future=True)
 
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool which keeps track of checkout wait time
+    (waiting for a free connection, opening a new one and pre-ping)
+    """
 
-async def get_session():
-    async_session = sessionmaker(
-        engine,
-        expire_on_commit=False,
-        class_=AsyncSession,
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_time = TimingStats()
+
+    def connect(self):
+        with self.checkout_time.measure():
+            return super().connect()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkout_time": self.checkout_time.as_dict(),
+        }
+
+
+class PgBouncerConnection(asyncpg.Connection):
+    """
+    Server connections are shared through PgBouncer: statement names
+    must not repeat across client connections
+    """
+
+    def _get_unique_id(self, prefix: str) -> str:
+        return f"__asyncpg_{prefix}_{uuid.uuid4()}__"
+
+
+def connect_args() -> dict:
+    """
+    With PgBouncer prepared statements are not cached: next transaction
+    may run on another server connection. Startup parameters like
+    statement_timeout are rejected by PgBouncer, set them for the role
+    :return: asyncpg connect arguments
+    """
+    if settings.POSTGRES_PGBOUNCER:
+        return {
+            "connection_class": PgBouncerConnection,
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        }
+    return {
+        "server_settings": {
+            "statement_timeout": str(settings.POSTGRES_STATEMENT_TIMEOUT_IN_MS),
+        },
+    }
+
+
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.POSTGRES_ECHO,
+        future=True,
+        poolclass=MeteredQueuePool,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT_IN_SECONDS,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE_IN_SECONDS,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+        connect_args=connect_args(),
     )
+
+
+engine = create_engine(settings.POSTGRES_URL)
+replica_engines = [create_engine(url) for url in settings.POSTGRES_REPLICA_URLS]
+_replicas = itertools.cycle(replica_engines)
+
+
+def next_replica() -> Optional[AsyncEngine]:
+    """
+    Round robin over replicas
+    :return: replica engine or None if there are no replicas
+    """
+    return next(_replicas) if replica_engines else None
+
+
+class RoutingSession(Session):
+    """
+    Sends statements to ``replica`` when a read only unit of work
+    sets it, to the primary otherwise
+    """
+
+    replica: Optional[AsyncEngine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is not None:
+            return self.replica.sync_engine
+        return super().get_bind(mapper, clause, **kw)
+
+
+async_session = sessionmaker(
+    engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+)
+
+
+async def get_session():
     async with async_session() as session:
         yield session
+
+
+def pool_stats(async_engine: AsyncEngine) -> dict:
+    pool = async_engine.pool
+    # Engines of create_engine, pools of other engines aren't metered
+    if not isinstance(pool, MeteredQueuePool):
+        return {}
+    return pool.stats()
+
+
+def get_pool_stats() -> dict:
+    return pool_stats(engine)
+
+
+def get_replica_pool_stats() -> list[dict]:
+    return [pool_stats(replica) for replica in replica_engines]
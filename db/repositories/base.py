@@ -1,8 +1,147 @@
 from abc import ABC
+from typing import Any, Optional, TypeVar
 
+from pydantic.types import UUID
+from sqlalchemy import (
+    Integer,
+    Text,
+    bindparam,
+    cast,
+    literal,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import Function, func
+from sqlalchemy.sql.selectable import Select, TableValuedAlias
+from sqlalchemy.sql.type_api import TypeEngine
+
+# Named tuple types of db.repositories.rows
+RowT = TypeVar("RowT", bound=tuple)
 
 
 class AbstractRepository(ABC):
     def __init__(self, session: AsyncSession):
         self.session = session
+
+    async def fetch_rows(
+        self,
+        row_type: type[RowT],
+        statement: Executable,
+        parameters: Optional[dict] = None,
+    ) -> list[RowT]:
+        """
+        :param row_type: named tuple with fields in statement column order
+        :param statement:
+        :param parameters:
+        :return: rows
+        """
+        results = await self.session.execute(statement, parameters)
+        return [row_type(*row) for row in results]
+
+    async def fetch_row(
+        self,
+        row_type: type[RowT],
+        statement: Executable,
+        parameters: Optional[dict] = None,
+    ) -> Optional[RowT]:
+        """
+        See fetch_rows
+        :return: row or None if statement returned no rows
+        """
+        results = await self.session.execute(statement, parameters)
+        row = results.one_or_none()
+        return None if row is None else row_type(*row)
+
+    async def fetch_json_page(
+        self, statement: Select, limit: int, **parameters: Any
+    ) -> tuple[str, Optional[UUID]]:
+        """
+        Runs statement built by json_page
+        :param statement:
+        :param limit: page size
+        :param parameters: parameters of the page statement
+        :return: page json and id of its last row if there are more rows
+        """
+        results = await self.session.execute(
+            statement, {**parameters, "limit": limit + 1, "size": limit}
+        )
+        page, fetched, last_id = results.one()
+        return page, UUID(last_id) if fetched > limit else None
+
+
+def json_object(**fields: Any) -> Function:
+    """
+    json_build_object() with keys rendered as literals, Postgres can't
+    infer type of bind parameters passed to it
+    :param fields: column expressions or model attributes
+    :return: json object expression
+    """
+    args: list[ColumnElement] = []
+    for name, value in fields.items():
+        args.append(literal_column(f"'{name}'"))
+        args.append(value)
+    return func.json_build_object(*args)
+
+
+def json_detail(statement: Select) -> Select:
+    """
+    Row of statement as json object built by Postgres,
+    keys are column names in select order
+    :param statement:
+    :return: statement returning json text or no rows
+    """
+    row = statement.subquery("detail")
+    return select(cast(json_object(**dict(row.c.items())), Text))
+
+
+def json_page(statement: Select) -> Select:
+    """
+    Keyset page as json array built by Postgres: no rows, ORM objects
+    or models are built in Python for it. Statement selects up to
+    ``limit`` rows ordered by id, ``size`` (limit - 1) of them
+    are the page, see AbstractRepository.fetch_json_page
+    :param statement:
+    :return: statement returning page json, number of fetched rows
+        and id of the last page row as text
+    """
+    rows = statement.subquery("page_rows")
+    numbered = select(
+        rows, func.row_number().over(order_by=rows.c.id).label("n")
+    ).subquery("numbered")
+    size = bindparam("size", type_=Integer)
+    item = json_object(**{name: numbered.c[name] for name in rows.c.keys()})
+    page = func.json_agg(aggregate_order_by(item, numbered.c.id)).filter(
+        numbered.c.n <= size
+    )
+    return select(
+        cast(func.coalesce(page, text("'[]'::json")), Text),
+        func.count(),
+        func.max(cast(numbered.c.id, Text)).filter(numbered.c.n == size),
+    )
+
+
+def unnest_rows(
+    name: str, columns: dict[str, TypeEngine], rows: list[dict]
+) -> TableValuedAlias:
+    """
+    Rows as a derived table for multi-row UPDATE ... FROM,
+    each column is sent as one typed array parameter
+    :param name: table alias
+    :param columns: column names and types
+    :param rows: missing values are NULL
+    :return: unnest(...) AS name(columns)
+    """
+    arrays = [
+        cast(literal([row.get(column) for row in rows], ARRAY(type_)), ARRAY(type_))
+        for column, type_ in columns.items()
+    ]
+    return (
+        func.unnest(*arrays)
+        .table_valued(*columns)
+        .render_derived(name=name, with_types=False)
+    )
@@ -1,82 +1,124 @@
-from sqlalchemy import select, text
+from collections.abc import AsyncIterator, Iterable, Iterator
+from itertools import islice
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.sql.functions import func
+from sqlmodel import col
 
 from db.repositories.base import AbstractRepository
 from models import Dish, Menu, Submenu
 
 
+def chunked(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
 class DataRepository(AbstractRepository):
-    async def dump_data(self) -> dict:
-        json_dishes_subquery = (
+    # Postgres accepts up to 32767 bind parameters per statement
+    bulk_insert_chunk_size = 5000
+    stream_batch_size = 1000
+
+    async def bulk_insert(
+        self,
+        menus: list[dict],
+        submenus: list[dict],
+        dishes: list[dict],
+    ):
+        """
+        Inserts rows with multi-row INSERT statements, parents first.
+        Rows must carry their ids and counters
+        :param menus:
+        :param submenus:
+        :param dishes:
+        :return: None
+        """
+        for model, rows in ((Menu, menus), (Submenu, submenus), (Dish, dishes)):
+            for chunk in chunked(rows, self.bulk_insert_chunk_size):
+                await self.session.execute(insert(model).values(chunk))
+
+    async def stream_rows(self) -> AsyncIterator[Row]:
+        """
+        Yields flat menu -> submenu -> dish rows ordered by tree,
+        rows are fetched from server side cursor in batches.
+        Submenu and dish columns are None for empty menus and submenus
+        :return: rows iterator
+        """
+        statement = (
             select(
-                Dish.submenu_id,
-                func.json_agg(
-                    func.json_build_object(
-                        "dish",
-                        func.json_build_object(
-                            "title",
-                            Dish.title,
-                            "description",
-                            Dish.description,
-                            "price",
-                            Dish.price,
-                        ),
-                    )
-                ).label("dishes"),
+                col(Menu.id).label("menu_id"),
+                col(Menu.title).label("menu_title"),
+                col(Menu.description).label("menu_description"),
+                col(Submenu.id).label("submenu_id"),
+                col(Submenu.title).label("submenu_title"),
+                col(Submenu.description).label("submenu_description"),
+                col(Dish.id).label("dish_id"),
+                col(Dish.title).label("dish_title"),
+                col(Dish.description).label("dish_description"),
+                col(Dish.price).label("dish_price"),
             )
-            .group_by(Dish.submenu_id)
-            .subquery()
+            .join(Submenu, Submenu.menu_id == Menu.id, isouter=True)
+            .join(Dish, Dish.submenu_id == Submenu.id, isouter=True)
+            .order_by(Menu.id, Submenu.id, Dish.id)
+            .execution_options(max_row_buffer=self.stream_batch_size)
         )
+        results = await self.session.stream(statement)
+        async for row in results:
+            yield row
 
-        json_submenus_subquery = (
+    async def repair_counters(self) -> tuple[list, list]:
+        """
+        Recomputes denormalized counters from dish and submenu tables,
+        updates only drifted rows
+        :return: repaired submenus (id, menu_id) and repaired menus ids
+        """
+        dishes_counts = (
             select(
-                Submenu.menu_id,
-                func.json_agg(
-                    func.json_build_object(
-                        "submenu",
-                        func.json_build_object(
-                            "title",
-                            Submenu.title,
-                            "description",
-                            Submenu.description,
-                        ),
-                        "dishes",
-                        func.coalesce(
-                            json_dishes_subquery.c.dishes, text("'[]'::json")
-                        ),
-                    )
-                ).label("submenus"),
-            )
-            .join(
-                json_dishes_subquery,
-                Submenu.id == json_dishes_subquery.c.submenu_id,
-                isouter=True,
+                Submenu.id,
+                func.count(Dish.id).label("dishes_count"),
             )
-            .group_by(Submenu.menu_id)
+            .join(Dish, Dish.submenu_id == Submenu.id, isouter=True)
+            .group_by(Submenu.id)
             .subquery()
         )
+        submenus_statement = (
+            update(Submenu)
+            .where(Submenu.id == dishes_counts.c.id)
+            .where(Submenu.dishes_count != dishes_counts.c.dishes_count)
+            .values(dishes_count=dishes_counts.c.dishes_count)
+            .returning(Submenu.id, Submenu.menu_id)
+            # Criteria can't be evaluated in Python, no instances are loaded
+            .execution_options(synchronize_session=False)
+        )
+        repaired_submenus = (await self.session.execute(submenus_statement)).all()
 
-        json_menus_subquery = select(
-            func.json_agg(
-                func.json_build_object(
-                    "menu",
-                    func.json_build_object(
-                        "title",
-                        Menu.title,
-                        "description",
-                        Menu.description,
-                    ),
-                    "submenus",
-                    func.coalesce(
-                        json_submenus_subquery.c.submenus, text("'[]'::json")
-                    ),
+        submenus_counts = (
+            select(
+                Menu.id,
+                func.count(Submenu.id).label("submenus_count"),
+                func.coalesce(func.sum(Submenu.dishes_count), 0).label("dishes_count"),
+            )
+            .join(Submenu, Submenu.menu_id == Menu.id, isouter=True)
+            .group_by(Menu.id)
+            .subquery()
+        )
+        menus_statement = (
+            update(Menu)
+            .where(Menu.id == submenus_counts.c.id)
+            .where(
+                or_(
+                    Menu.submenus_count != submenus_counts.c.submenus_count,
+                    Menu.dishes_count != submenus_counts.c.dishes_count,
                 )
-            ).label("menus")
-        ).join(
-            json_submenus_subquery,
-            Menu.id == json_submenus_subquery.c.menu_id,
-            isouter=True,
+            )
+            .values(
+                submenus_count=submenus_counts.c.submenus_count,
+                dishes_count=submenus_counts.c.dishes_count,
+            )
+            .returning(Menu.id)
+            .execution_options(synchronize_session=False)
         )
-        results = await self.session.execute(json_menus_subquery)
-        response = dict(results.one())
-        return response
+        repaired_menus = (await self.session.execute(menus_statement)).scalars().all()
+        return repaired_submenus, repaired_menus
@@ -1,60 +1,172 @@
-from typing import Optional
+import uuid as uuid_pkg
+from collections.abc import Sequence
+from decimal import Decimal
+from typing import Any, Optional
 
 from pydantic.types import UUID
-from sqlalchemy import select
+from sqlalchemy import (
+    Numeric,
+    String,
+    and_,
+    bindparam,
+    cast,
+    delete,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql.functions import func
+from sqlalchemy.sql.selectable import Select
+from sqlmodel import col
 
-from api.v1.schemas.dishes import DishBase, DishUpdate
-from db.repositories.base import AbstractRepository
-from models import Dish, Submenu
+from api.v1.schemas.dishes import DishBase, DishBatchUpdate, DishUpdate
+from db.repositories.base import AbstractRepository, json_detail, json_page, unnest_rows
+from db.repositories.rows import DishRow
+from models import Dish, Menu, Submenu
+
+
+def submenu_dishes_statement(*columns: Any) -> Select:
+    return (
+        select(*columns)
+        .join(Submenu)
+        .where(Dish.submenu_id == bindparam("submenu_id"))
+        .where(Submenu.menu_id == bindparam("menu_id"))
+    )
+
+
+# Built once, see MENU_LIST
+DISH_COLUMNS = (Dish.title, Dish.description, Dish.price, Dish.id)
+DISH_LIST = (
+    submenu_dishes_statement(*DISH_COLUMNS).order_by(Dish.id).limit(bindparam("limit"))
+)
+DISH_LIST_AFTER = DISH_LIST.where(Dish.id > bindparam("after"))
+DISH_DETAIL = submenu_dishes_statement(*DISH_COLUMNS).where(
+    Dish.id == bindparam("dish_id")
+)
+# Price is a string in DishDetail
+DISH_JSON_COLUMNS = (
+    Dish.title,
+    Dish.description,
+    cast(Dish.price, String).label("price"),
+    Dish.id,
+)
+DISH_JSON_LIST = (
+    submenu_dishes_statement(*DISH_JSON_COLUMNS)
+    .order_by(Dish.id)
+    .limit(bindparam("limit"))
+)
+DISH_LIST_JSON = json_page(DISH_JSON_LIST)
+DISH_LIST_AFTER_JSON = json_page(DISH_JSON_LIST.where(Dish.id > bindparam("after")))
+DISH_DETAIL_JSON = json_detail(
+    submenu_dishes_statement(*DISH_JSON_COLUMNS).where(Dish.id == bindparam("dish_id"))
+)
 
 
 class DishRepository(AbstractRepository):
-    async def create(self, dish: DishBase, submenu_id: UUID) -> Dish:
-        new_dish = Dish(submenu_id=submenu_id, **dish.dict())
-        self.session.add(new_dish)
-        return new_dish
+    async def create(
+        self, dish: DishBase, menu_id: UUID, submenu_id: UUID
+    ) -> Optional[DishRow]:
+        """
+        :param dish:
+        :param menu_id:
+        :param submenu_id:
+        :return: created dish or None if submenu doesn't exist in the menu
+        """
+        created = await self.bulk_create([dish], menu_id, submenu_id)
+        return created[0] if created else None
 
-    async def list(self, menu_id: UUID, submenu_id: UUID) -> list[Dish]:
+    async def _change_dishes_count(self, submenu_id: UUID, delta: int):
+        """
+        Updates dishes counters of submenu and its menu in one statement
+        :param submenu_id:
+        :param delta:
+        :return: None
+        """
+        updated_submenu = (
+            update(Submenu)
+            .where(Submenu.id == submenu_id)
+            .values(dishes_count=Submenu.dishes_count + delta)
+            .returning(Submenu.menu_id)
+            .cte("updated_submenu")
+        )
         statement = (
-            select(
-                Dish.id,
-                Dish.description,
-                Dish.title,
-                Dish.price,
-            )
-            .join(Submenu)
-            .where(
-                Dish.submenu_id == submenu_id,
-            )
-            .where(
-                Submenu.menu_id == menu_id,
-            )
+            update(Menu)
+            .where(Menu.id == updated_submenu.c.menu_id)
+            .values(dishes_count=Menu.dishes_count + delta)
+            # Criteria can't be evaluated in Python, no instances are loaded
+            .execution_options(synchronize_session=False)
         )
-        results = await self.session.execute(statement)
-        dishes: list[Dish] = results.all()
-        return dishes
+        await self.session.execute(statement)
+
+    async def list(
+        self,
+        menu_id: UUID,
+        submenu_id: UUID,
+        limit: int,
+        after: Optional[UUID] = None,
+    ) -> list[DishRow]:
+        """
+        Page of submenu dishes ordered by id, read by ix_dish_submenu_id
+        :param menu_id:
+        :param submenu_id:
+        :param limit:
+        :param after: id of the last dish of previous page
+        :return: dishes
+        """
+        parameters = {"menu_id": menu_id, "submenu_id": submenu_id, "limit": limit}
+        if after is None:
+            return await self.fetch_rows(DishRow, DISH_LIST, parameters)
+        return await self.fetch_rows(
+            DishRow, DISH_LIST_AFTER, {**parameters, "after": after}
+        )
+
+    async def list_json(
+        self,
+        menu_id: UUID,
+        submenu_id: UUID,
+        limit: int,
+        after: Optional[UUID] = None,
+    ) -> tuple[str, Optional[UUID]]:
+        """
+        Page of submenu dishes as DishList json, see list
+        :param menu_id:
+        :param submenu_id:
+        :param limit:
+        :param after: id of the last dish of previous page
+        :return: json and id of the last dish if there are more dishes
+        """
+        parameters = {"menu_id": menu_id, "submenu_id": submenu_id}
+        if after is None:
+            return await self.fetch_json_page(DISH_LIST_JSON, limit, **parameters)
+        return await self.fetch_json_page(
+            DISH_LIST_AFTER_JSON, limit, after=after, **parameters
+        )
+
+    async def get_detail_json(
+        self, menu_id: UUID, submenu_id: UUID, dish_id: UUID
+    ) -> Optional[str]:
+        """
+        :param menu_id:
+        :param submenu_id:
+        :param dish_id:
+        :return: DishDetail json or None if dish doesn't exist in the submenu
+        """
+        results = await self.session.execute(
+            DISH_DETAIL_JSON,
+            {"menu_id": menu_id, "submenu_id": submenu_id, "dish_id": dish_id},
+        )
+        dish: Optional[str] = results.scalar_one_or_none()
+        return dish
 
     async def get(
         self, menu_id: UUID, submenu_id: UUID, dish_id: UUID
-    ) -> Optional[Dish]:
-        statement = (
-            select(
-                Dish,
-            )
-            .join(Submenu)
-            .where(
-                Dish.submenu_id == submenu_id,
-            )
-            .where(
-                Submenu.menu_id == menu_id,
-            )
-            .where(
-                Dish.id == dish_id,
-            )
+    ) -> Optional[DishRow]:
+        return await self.fetch_row(
+            DishRow,
+            DISH_DETAIL,
+            {"menu_id": menu_id, "submenu_id": submenu_id, "dish_id": dish_id},
         )
-        results = await self.session.execute(statement)
-        detailed_dish: Optional[Dish] = results.scalar_one_or_none()
-        return detailed_dish
 
     async def update(
         self,
@@ -62,16 +174,171 @@ class DishRepository(AbstractRepository):
         submenu_id: UUID,
         dish_id: UUID,
         update_submenu: DishUpdate,
-    ) -> Optional[Dish]:
-        if current_dish := await self.get(menu_id, submenu_id, dish_id):
-            update_menu = update_submenu.dict(exclude_unset=True)
-            for key, value in update_menu.items():
-                setattr(current_dish, key, value)
-            self.session.add(current_dish)
-        return current_dish
+    ) -> Optional[DishRow]:
+        """
+        One UPDATE ... RETURNING, menu of the submenu is checked
+        by a subquery, no ORM object is loaded
+        :param menu_id:
+        :param submenu_id:
+        :param dish_id:
+        :param update_submenu:
+        :return: updated dish or None if it doesn't exist in the submenu
+        """
+        values = update_submenu.dict(exclude_unset=True)
+        if not values:
+            return await self.get(menu_id, submenu_id, dish_id)
+        if values.get("price") is not None:
+            values["price"] = Decimal(values["price"])
+        statement = (
+            update(Dish)
+            .where(Dish.id == dish_id)
+            .where(Dish.submenu_id == self._submenu_of_menu(menu_id, submenu_id))
+            .values(**values)
+            .returning(*DISH_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        return await self.fetch_row(DishRow, statement)
 
     async def delete(self, menu_id: UUID, submenu_id: UUID, dish_id: UUID) -> bool:
-        if current_dish := await self.get(menu_id, submenu_id, dish_id):
-            await self.session.delete(current_dish)
-            return True
-        return False
+        """
+        One DELETE ... RETURNING and counters update
+        :param menu_id:
+        :param submenu_id:
+        :param dish_id:
+        :return: True if dish was deleted
+        """
+        statement = (
+            delete(Dish)
+            .where(Dish.id == dish_id)
+            .where(Dish.submenu_id == self._submenu_of_menu(menu_id, submenu_id))
+            .returning(Dish.id)
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        if results.one_or_none() is None:
+            return False
+        await self._change_dishes_count(submenu_id, delta=-1)
+        return True
+
+    def _submenu_of_menu(self, menu_id: UUID, submenu_id: UUID):
+        """
+        Statements using it run with synchronize_session=False,
+        ORM can't evaluate the subquery in Python
+        :param menu_id:
+        :param submenu_id:
+        :return: id of the submenu if it belongs to the menu
+        """
+        return (
+            select(Submenu.id)
+            .where(Submenu.id == submenu_id)
+            .where(Submenu.menu_id == menu_id)
+            .scalar_subquery()
+        )
+
+    async def bulk_create(
+        self, dishes: Sequence[DishBase], menu_id: UUID, submenu_id: UUID
+    ) -> Sequence[DishRow]:
+        """
+        Inserts dishes with one INSERT ... SELECT guarded by the submenu
+        row, nothing is inserted if submenu doesn't exist in the menu
+        :param dishes:
+        :param menu_id:
+        :param submenu_id:
+        :return: created dishes
+        """
+        values = unnest_rows(
+            "v",
+            {
+                "id": PG_UUID(as_uuid=True),
+                "title": String(),
+                "description": String(),
+                "price": Numeric(),
+            },
+            [
+                {**dish.dict(), "id": uuid_pkg.uuid4(), "price": Decimal(dish.price)}
+                for dish in dishes
+            ],
+        )
+        rows = (
+            select(
+                values.c.id,
+                values.c.title,
+                values.c.description,
+                values.c.price,
+                Submenu.id,
+            )
+            .select_from(values)
+            .join(Submenu, and_(Submenu.id == submenu_id, Submenu.menu_id == menu_id))
+        )
+        statement = (
+            insert(Dish)
+            .from_select(["id", "title", "description", "price", "submenu_id"], rows)
+            .returning(*DISH_COLUMNS)
+        )
+        created = await self.fetch_rows(DishRow, statement)
+        if created:
+            await self._change_dishes_count(submenu_id, delta=len(created))
+        return created
+
+    async def bulk_update(
+        self, menu_id: UUID, submenu_id: UUID, dishes: Sequence[DishBatchUpdate]
+    ) -> Sequence[DishRow]:
+        """
+        Updates dishes with one UPDATE ... FROM unnest(...),
+        fields which are not set keep their values
+        :param menu_id:
+        :param submenu_id:
+        :param dishes:
+        :return: updated dishes, dishes of other submenus are skipped
+        """
+        rows = []
+        for dish in dishes:
+            row = dish.dict(exclude_unset=True)
+            if row.get("price") is not None:
+                row["price"] = Decimal(row["price"])
+            rows.append(row)
+        values = unnest_rows(
+            "v",
+            {
+                "id": PG_UUID(as_uuid=True),
+                "title": String(),
+                "description": String(),
+                "price": Numeric(),
+            },
+            rows,
+        )
+        statement = (
+            update(Dish)
+            .where(Dish.id == values.c.id)
+            .where(Dish.submenu_id == self._submenu_of_menu(menu_id, submenu_id))
+            .values(
+                title=func.coalesce(values.c.title, Dish.title),
+                description=func.coalesce(values.c.description, Dish.description),
+                price=func.coalesce(values.c.price, Dish.price),
+            )
+            .returning(*DISH_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        return await self.fetch_rows(DishRow, statement)
+
+    async def bulk_delete(
+        self, menu_id: UUID, submenu_id: UUID, dish_ids: Sequence[UUID]
+    ) -> int:
+        """
+        :param menu_id:
+        :param submenu_id:
+        :param dish_ids:
+        :return: number of deleted dishes, dishes of other submenus are skipped
+        """
+        statement = (
+            delete(Dish)
+            .where(col(Dish.id).in_(dish_ids))
+            .where(Dish.submenu_id == self._submenu_of_menu(menu_id, submenu_id))
+            .returning(Dish.id)
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        deleted = len(results.all())
+        if deleted:
+            await self._change_dishes_count(submenu_id, delta=-deleted)
+        return deleted
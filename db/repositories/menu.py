@@ -1,113 +1,167 @@
 from typing import Optional
 
 from pydantic.types import UUID
-from sqlalchemy import func, select
+from sqlalchemy import (
+    String,
+    Text,
+    bindparam,
+    cast,
+    delete,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.sql.functions import func
+from sqlalchemy.sql.selectable import Select
 
 from api.v1.schemas.menus import MenuBase, MenuUpdate
-from db.repositories.base import AbstractRepository
-from models import Menu, Submenu
+from db.repositories.base import AbstractRepository, json_detail, json_object, json_page
+from db.repositories.rows import MenuRow
+from models import Dish, Menu, Submenu
+
+
+def menu_tree_statement() -> Select:
+    """
+    Menu with its submenus and their dishes as json (see MenuTree),
+    built by one statement. Nested lists are read by correlated
+    subqueries over submenu and dish foreign key indexes
+    :return: statement with ``id`` parameter
+    """
+    dish_json = json_object(
+        id=Dish.id,
+        title=Dish.title,
+        description=Dish.description,
+        price=cast(Dish.price, String),
+    )
+    dishes = (
+        select(func.json_agg(aggregate_order_by(dish_json, Dish.id)))
+        .where(Dish.submenu_id == Submenu.id)
+        .scalar_subquery()
+    )
+    submenu_json = json_object(
+        id=Submenu.id,
+        title=Submenu.title,
+        description=Submenu.description,
+        dishes_count=Submenu.dishes_count,
+        dishes=func.coalesce(dishes, text("'[]'::json")),
+    )
+    submenus = (
+        select(func.json_agg(aggregate_order_by(submenu_json, Submenu.id)))
+        .where(Submenu.menu_id == Menu.id)
+        .scalar_subquery()
+    )
+    menu_json = json_object(
+        id=Menu.id,
+        title=Menu.title,
+        description=Menu.description,
+        submenus_count=Menu.submenus_count,
+        dishes_count=Menu.dishes_count,
+        submenus=func.coalesce(submenus, text("'[]'::json")),
+    )
+    return select(cast(menu_json, Text)).where(Menu.id == bindparam("id"))
+
+
+# Read statements are built once, calls only bind parameters: compiled
+# SQL comes from SQLAlchemy cache, asyncpg prepares it once per connection
+# In order of MenuDetail fields, json_page keys follow it
+MENU_COLUMNS = (
+    Menu.title,
+    Menu.description,
+    Menu.id,
+    Menu.submenus_count,
+    Menu.dishes_count,
+)
+MENU_LIST = select(*MENU_COLUMNS).order_by(Menu.id).limit(bindparam("limit"))
+MENU_LIST_AFTER = MENU_LIST.where(Menu.id > bindparam("after"))
+MENU_DETAIL = select(*MENU_COLUMNS).where(Menu.id == bindparam("id"))
+MENU_TREE = menu_tree_statement()
+MENU_LIST_JSON = json_page(MENU_LIST)
+MENU_LIST_AFTER_JSON = json_page(MENU_LIST_AFTER)
+MENU_DETAIL_JSON = json_detail(MENU_DETAIL)
 
 
 class MenuRepository(AbstractRepository):
-    async def create(self, menu: MenuBase) -> Menu:
-        new_menu = Menu.from_orm(menu)
-        self.session.add(new_menu)
+    async def create(self, menu: MenuBase) -> MenuRow:
+        """
+        One INSERT ... RETURNING, id and counters are column defaults
+        :param menu:
+        :return: created menu
+        """
+        statement = insert(Menu).values(**menu.dict()).returning(*MENU_COLUMNS)
+        new_menu: MenuRow = await self.fetch_row(MenuRow, statement)
         return new_menu
 
-    async def list(self) -> list[Menu]:
-        subquery = (
-            select(
-                Submenu.id,
-                Submenu.description,
-                Submenu.title,
-                Submenu.menu_id,
-                func.count(Submenu.dishes).label("dishes_count"),
-            )
-            .join(
-                Submenu.dishes,
-                isouter=True,
-            )
-            .group_by(Submenu.id)
-            .subquery()
+    async def list(self, limit: int, after: Optional[UUID] = None) -> list[MenuRow]:
+        """
+        Page of menus ordered by id
+        :param limit:
+        :param after: id of the last menu of previous page
+        :return: menus
+        """
+        if after is None:
+            return await self.fetch_rows(MenuRow, MENU_LIST, {"limit": limit})
+        return await self.fetch_rows(
+            MenuRow, MENU_LIST_AFTER, {"limit": limit, "after": after}
         )
-        statement = (
-            select(
-                Menu.id,
-                Menu.description,
-                Menu.title,
-                func.count(subquery.c.id).label("submenus_count"),
-                func.coalesce(
-                    func.sum(subquery.c.dishes_count),
-                    0,
-                ).label("dishes_count"),
-            )
-            .outerjoin(
-                subquery,
-                Menu.id == subquery.c.menu_id,
-            )
-            .group_by(Menu.id)
-        )
-        results = await self.session.execute(statement)
-        menus: list[Menu] = results.all()
-        return menus
 
-    async def get(self, id: UUID) -> Optional[Menu]:
-        menu = await self.session.get(Menu, id)
+    async def list_json(
+        self, limit: int, after: Optional[UUID] = None
+    ) -> tuple[str, Optional[UUID]]:
+        """
+        Page of menus as MenuList json, see list
+        :param limit:
+        :param after: id of the last menu of previous page
+        :return: json and id of the last menu if there are more menus
+        """
+        if after is None:
+            return await self.fetch_json_page(MENU_LIST_JSON, limit)
+        return await self.fetch_json_page(MENU_LIST_AFTER_JSON, limit, after=after)
+
+    async def get_detail(self, id: UUID) -> Optional[MenuRow]:
+        return await self.fetch_row(MenuRow, MENU_DETAIL, {"id": id})
+
+    async def get_detail_json(self, id: UUID) -> Optional[str]:
+        """
+        :param id:
+        :return: MenuDetail json or None if menu doesn't exist
+        """
+        results = await self.session.execute(MENU_DETAIL_JSON, {"id": id})
+        menu: Optional[str] = results.scalar_one_or_none()
         return menu
 
-    async def get_detail(self, id: UUID) -> Optional[Menu]:
-        subquery = (
-            select(
-                Submenu.id,
-                Submenu.description,
-                Submenu.title,
-                Submenu.menu_id,
-                func.count(Submenu.dishes).label("dishes_count"),
-            )
-            .where(
-                Submenu.menu_id == id,
-            )
-            .join(
-                Submenu.dishes,
-                isouter=True,
-            )
-            .group_by(Submenu.id)
-            .subquery()
-        )
+    async def get_tree(self, id: UUID) -> Optional[str]:
+        """
+        :param id:
+        :return: menu tree json or None if menu doesn't exist
+        """
+        results = await self.session.execute(MENU_TREE, {"id": id})
+        tree: Optional[str] = results.scalar_one_or_none()
+        return tree
+
+    async def update(self, id: UUID, update_menu: MenuUpdate) -> Optional[MenuRow]:
+        """
+        One UPDATE ... RETURNING, no ORM object is loaded
+        :param id:
+        :param update_menu:
+        :return: updated menu or None if it doesn't exist
+        """
+        values = update_menu.dict(exclude_unset=True)
+        if not values:
+            return await self.get_detail(id)
         statement = (
-            select(
-                Menu.id,
-                Menu.description,
-                Menu.title,
-                func.count(subquery.c.id).label("submenus_count"),
-                func.coalesce(
-                    func.sum(subquery.c.dishes_count),
-                    0,
-                ).label("dishes_count"),
-            )
-            .where(
-                Menu.id == id,
-            )
-            .outerjoin(
-                subquery,
-                Menu.id == subquery.c.menu_id,
-            )
-            .group_by(Menu.id)
+            update(Menu).where(Menu.id == id).values(**values).returning(*MENU_COLUMNS)
         )
-        results = await self.session.execute(statement)
-        menu: Optional[Menu] = results.one_or_none()
-        return menu
-
-    async def update(self, id: UUID, update_menu: MenuUpdate) -> Optional[Menu]:
-        if menu := await self.get(id):
-            update_menu = update_menu.dict(exclude_unset=True)
-            for key, value in update_menu.items():
-                setattr(menu, key, value)
-            self.session.add(menu)
-        return menu
+        return await self.fetch_row(MenuRow, statement)
 
     async def delete(self, id: UUID) -> bool:
-        if menu := await self.get(id):
-            await self.session.delete(menu)
-            return True
-        return False
+        """
+        One DELETE ... RETURNING, submenus and dishes
+        are deleted by foreign keys cascade
+        :param id:
+        :return: True if menu was deleted
+        """
+        statement = delete(Menu).where(Menu.id == id).returning(Menu.id)
+        results = await self.session.execute(statement)
+        return results.one_or_none() is not None
@@ -0,0 +1,32 @@
+from decimal import Decimal
+from typing import NamedTuple
+
+from pydantic.types import UUID
+
+__all__ = ("MenuRow", "SubmenuRow", "DishRow")
+
+# Rows repositories return to services: plain tuples, no ORM instance
+# state or per-row dict. Fields are in order of the detail schemas,
+# which read them with from_orm (orm_mode)
+
+
+class MenuRow(NamedTuple):
+    title: str
+    description: str
+    id: UUID
+    submenus_count: int
+    dishes_count: int
+
+
+class SubmenuRow(NamedTuple):
+    title: str
+    description: str
+    id: UUID
+    dishes_count: int
+
+
+class DishRow(NamedTuple):
+    title: str
+    description: str
+    price: Decimal
+    id: UUID
@@ -1,85 +1,249 @@
+import uuid as uuid_pkg
+from collections.abc import Sequence
 from typing import Optional
 
 from pydantic.types import UUID
-from sqlalchemy import func, select
+from sqlalchemy import String, bindparam, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql.functions import func
+from sqlmodel import col
 
-from api.v1.schemas.submenus import SubmenuBase, SubmenuUpdate
-from db.repositories.base import AbstractRepository
-from models import Submenu
+from api.v1.schemas.submenus import SubmenuBase, SubmenuBatchUpdate, SubmenuUpdate
+from db.repositories.base import AbstractRepository, json_detail, json_page, unnest_rows
+from db.repositories.rows import SubmenuRow
+from models import Menu, Submenu
+
+# Built once, see MENU_LIST
+SUBMENU_COLUMNS = (
+    Submenu.title,
+    Submenu.description,
+    Submenu.id,
+    Submenu.dishes_count,
+)
+SUBMENU_LIST = (
+    select(*SUBMENU_COLUMNS)
+    .where(Submenu.menu_id == bindparam("menu_id"))
+    .order_by(Submenu.id)
+    .limit(bindparam("limit"))
+)
+SUBMENU_LIST_AFTER = SUBMENU_LIST.where(Submenu.id > bindparam("after"))
+SUBMENU_DETAIL = (
+    select(*SUBMENU_COLUMNS)
+    .where(Submenu.menu_id == bindparam("menu_id"))
+    .where(Submenu.id == bindparam("submenu_id"))
+)
+
+SUBMENU_LIST_JSON = json_page(SUBMENU_LIST)
+SUBMENU_LIST_AFTER_JSON = json_page(SUBMENU_LIST_AFTER)
+SUBMENU_DETAIL_JSON = json_detail(SUBMENU_DETAIL)
 
 
 class SubmenuRepository(AbstractRepository):
-    async def create(self, submenu: SubmenuBase, menu_id: UUID) -> Submenu:
-        new_submenu = Submenu(menu_id=menu_id, **submenu.dict())
-        self.session.add(new_submenu)
-        return new_submenu
+    async def create(self, submenu: SubmenuBase, menu_id: UUID) -> Optional[SubmenuRow]:
+        """
+        :param submenu:
+        :param menu_id:
+        :return: created submenu or None if menu doesn't exist
+        """
+        created = await self.bulk_create([submenu], menu_id)
+        return created[0] if created else None
 
-    async def list(self, menu_id: UUID) -> list[Submenu]:
+    async def _change_menu_counters(
+        self, menu_id: UUID, submenus_delta: int, dishes_delta: int
+    ):
         statement = (
-            select(
-                Submenu.id,
-                Submenu.description,
-                Submenu.title,
-                func.count(Submenu.dishes).label("dishes_count"),
-            )
-            .where(
-                Submenu.menu_id == menu_id,
+            update(Menu)
+            .where(Menu.id == menu_id)
+            .values(
+                submenus_count=Menu.submenus_count + submenus_delta,
+                dishes_count=Menu.dishes_count + dishes_delta,
             )
-            .join(
-                Submenu.dishes,
-                isouter=True,
-            )
-            .group_by(Submenu.id)
         )
-        results = await self.session.execute(statement=statement)
-        submenus: list[Submenu] = results.all()
-        return submenus
+        await self.session.execute(statement)
+
+    async def list(
+        self, menu_id: UUID, limit: int, after: Optional[UUID] = None
+    ) -> list[SubmenuRow]:
+        """
+        Page of menu submenus ordered by id, read by ix_submenu_menu_id
+        :param menu_id:
+        :param limit:
+        :param after: id of the last submenu of previous page
+        :return: submenus
+        """
+        parameters = {"menu_id": menu_id, "limit": limit}
+        if after is None:
+            return await self.fetch_rows(SubmenuRow, SUBMENU_LIST, parameters)
+        return await self.fetch_rows(
+            SubmenuRow, SUBMENU_LIST_AFTER, {**parameters, "after": after}
+        )
+
+    async def list_json(
+        self, menu_id: UUID, limit: int, after: Optional[UUID] = None
+    ) -> tuple[str, Optional[UUID]]:
+        """
+        Page of menu submenus as SubmenuList json, see list
+        :param menu_id:
+        :param limit:
+        :param after: id of the last submenu of previous page
+        :return: json and id of the last submenu if there are more submenus
+        """
+        if after is None:
+            return await self.fetch_json_page(SUBMENU_LIST_JSON, limit, menu_id=menu_id)
+        return await self.fetch_json_page(
+            SUBMENU_LIST_AFTER_JSON, limit, menu_id=menu_id, after=after
+        )
+
+    async def get_detail(self, menu_id: UUID, submenu_id: UUID) -> Optional[SubmenuRow]:
+        return await self.fetch_row(
+            SubmenuRow, SUBMENU_DETAIL, {"menu_id": menu_id, "submenu_id": submenu_id}
+        )
 
-    async def get(self, menu_id: UUID, submenu_id: UUID) -> Optional[Submenu]:
+    async def get_detail_json(self, menu_id: UUID, submenu_id: UUID) -> Optional[str]:
+        """
+        :param menu_id:
+        :param submenu_id:
+        :return: SubmenuDetail json or None if submenu doesn't exist in the menu
+        """
+        results = await self.session.execute(
+            SUBMENU_DETAIL_JSON, {"menu_id": menu_id, "submenu_id": submenu_id}
+        )
+        submenu: Optional[str] = results.scalar_one_or_none()
+        return submenu
+
+    async def update(
+        self, menu_id: UUID, submenu_id: UUID, update_submenu: SubmenuUpdate
+    ) -> Optional[SubmenuRow]:
+        """
+        One UPDATE ... RETURNING, no ORM object is loaded
+        :param menu_id:
+        :param submenu_id:
+        :param update_submenu:
+        :return: updated submenu or None if it doesn't exist in the menu
+        """
+        values = update_submenu.dict(exclude_unset=True)
+        if not values:
+            return await self.get_detail(menu_id, submenu_id)
         statement = (
-            select(Submenu)
-            .where(
-                Submenu.menu_id == menu_id,
-            )
+            update(Submenu)
+            .where(Submenu.id == submenu_id)
+            .where(Submenu.menu_id == menu_id)
+            .values(**values)
+            .returning(*SUBMENU_COLUMNS)
+        )
+        return await self.fetch_row(SubmenuRow, statement)
+
+    async def delete(self, menu_id: UUID, submenu_id: UUID) -> bool:
+        """
+        One DELETE ... RETURNING and menu counters update,
+        dishes are deleted by foreign key cascade
+        :param menu_id:
+        :param submenu_id:
+        :return: True if submenu was deleted
+        """
+        statement = (
+            delete(Submenu)
             .where(Submenu.id == submenu_id)
+            .where(Submenu.menu_id == menu_id)
+            .returning(Submenu.dishes_count)
         )
         results = await self.session.execute(statement)
-        detailed_submenu: Optional[Submenu] = results.scalar_one_or_none()
-        return detailed_submenu
+        dishes_count: Optional[int] = results.scalar_one_or_none()
+        if dishes_count is None:
+            return False
+        await self._change_menu_counters(
+            menu_id, submenus_delta=-1, dishes_delta=-dishes_count
+        )
+        return True
 
-    async def get_detail(self, menu_id: UUID, submenu_id: UUID) -> Optional[Submenu]:
+    async def bulk_create(
+        self, submenus: Sequence[SubmenuBase], menu_id: UUID
+    ) -> Sequence[SubmenuRow]:
+        """
+        Inserts submenus with one INSERT ... SELECT guarded by the menu
+        row, nothing is inserted if menu doesn't exist
+        :param submenus:
+        :param menu_id:
+        :return: created submenus
+        """
+        values = unnest_rows(
+            "v",
+            {
+                "id": PG_UUID(as_uuid=True),
+                "title": String(),
+                "description": String(),
+            },
+            [{**submenu.dict(), "id": uuid_pkg.uuid4()} for submenu in submenus],
+        )
+        rows = (
+            select(values.c.id, values.c.title, values.c.description, Menu.id)
+            .select_from(values)
+            .join(Menu, Menu.id == menu_id)
+        )
         statement = (
-            select(
-                Submenu.id,
-                Submenu.description,
-                Submenu.title,
-                func.count(Submenu.dishes).label("dishes_count"),
-            )
-            .where(
-                Submenu.menu_id == menu_id,
+            insert(Submenu)
+            .from_select(["id", "title", "description", "menu_id"], rows)
+            .returning(*SUBMENU_COLUMNS)
+        )
+        created = await self.fetch_rows(SubmenuRow, statement)
+        if created:
+            await self._change_menu_counters(
+                menu_id, submenus_delta=len(created), dishes_delta=0
             )
-            .where(
-                Submenu.id == submenu_id,
+        return created
+
+    async def bulk_update(
+        self, menu_id: UUID, submenus: Sequence[SubmenuBatchUpdate]
+    ) -> Sequence[SubmenuRow]:
+        """
+        Updates submenus with one UPDATE ... FROM unnest(...),
+        fields which are not set keep their values
+        :param menu_id:
+        :param submenus:
+        :return: updated submenus, submenus of other menus are skipped
+        """
+        values = unnest_rows(
+            "v",
+            {
+                "id": PG_UUID(as_uuid=True),
+                "title": String(),
+                "description": String(),
+            },
+            [submenu.dict(exclude_unset=True) for submenu in submenus],
+        )
+        statement = (
+            update(Submenu)
+            .where(Submenu.id == values.c.id)
+            .where(Submenu.menu_id == menu_id)
+            .values(
+                title=func.coalesce(values.c.title, Submenu.title),
+                description=func.coalesce(values.c.description, Submenu.description),
             )
-            .join(Submenu.dishes, isouter=True)
-            .group_by(Submenu.id)
+            .returning(*SUBMENU_COLUMNS)
+            # ORM can't evaluate unnest columns in Python
+            .execution_options(synchronize_session=False)
         )
-        results = await self.session.execute(statement)
-        submenu: Optional[Submenu] = results.one_or_none()
-        return submenu
-
-    async def update(
-        self, menu_id: UUID, submenu_id: UUID, update_submenu: SubmenuUpdate
-    ) -> Optional[Submenu]:
-        if submenu := await self.get(menu_id, submenu_id):
-            update_menu = update_submenu.dict(exclude_unset=True)
-            for key, value in update_menu.items():
-                setattr(submenu, key, value)
-            self.session.add(submenu)
-        return submenu
+        return await self.fetch_rows(SubmenuRow, statement)
 
-    async def delete(self, menu_id: UUID, submenu_id: UUID) -> bool:
-        if current_submenu := await self.get(menu_id, submenu_id):
-            await self.session.delete(current_submenu)
-            return True
-        return False
+    async def bulk_delete(self, menu_id: UUID, submenu_ids: Sequence[UUID]) -> int:
+        """
+        Deletes submenus, dishes are deleted by foreign key cascade
+        :param menu_id:
+        :param submenu_ids:
+        :return: number of deleted submenus, submenus of other menus are skipped
+        """
+        statement = (
+            delete(Submenu)
+            .where(col(Submenu.id).in_(submenu_ids))
+            .where(Submenu.menu_id == menu_id)
+            .returning(Submenu.dishes_count)
+        )
+        results = await self.session.execute(statement)
+        dishes_counts = results.scalars().all()
+        if dishes_counts:
+            await self._change_menu_counters(
+                menu_id,
+                submenus_delta=-len(dishes_counts),
+                dishes_delta=-sum(dishes_counts),
+            )
+        return len(dishes_counts)
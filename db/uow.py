@@ -1,24 +1,156 @@
+import time
+from typing import Optional
+
+from fastapi import Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import get_settings
+from core.metrics import TimingStats
+from db.db import get_session, next_replica
+from db.repositories.data import DataRepository
 from db.repositories.dish import DishRepository
 from db.repositories.menu import MenuRepository
 from db.repositories.submenu import SubmenuRepository
 
+settings = get_settings()
+
+# Clients which wrote recently read from the primary until this time
+READ_YOUR_WRITES_COOKIE = "db-primary-until"
+
+# Worker wide timings of units of work by kind:
+# begin - connection checkout, body - statements, commit - commit and close
+UOW_TIMINGS: dict[str, dict[str, TimingStats]] = {
+    kind: {phase: TimingStats() for phase in ("begin", "body", "commit")}
+    for kind in ("read", "write")
+}
+
+
+def read_only_options() -> dict:
+    """
+    Read only units run without a transaction (autocommit: no BEGIN and
+    COMMIT round trips, each statement sees its own snapshot) or in a
+    READ ONLY transaction, see POSTGRES_READ_ONLY_AUTOCOMMIT.
+    PgBouncer needs a transaction: statement prepare and execute
+    must reach the same server connection
+    :return: connection execution options
+    """
+    if settings.POSTGRES_READ_ONLY_AUTOCOMMIT and not settings.POSTGRES_PGBOUNCER:
+        return {"isolation_level": "AUTOCOMMIT"}
+    return {"postgresql_readonly": True}
+
+
+def pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies[READ_YOUR_WRITES_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
 
 class SqlModelUnitOfWork:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        pinned: bool = False,
+        response: Optional[Response] = None,
+    ):
+        """
+        :param session:
+        :param pinned: read only units use the primary too
+        :param response: gets the read your writes cookie after a write
+        """
         self.session = session
         self.menu_repo = MenuRepository(session=session)
         self.submenu_repo = SubmenuRepository(session=session)
         self.dish_repo = DishRepository(session=session)
+        self.data_repo = DataRepository(session=session)
+        self.pinned = pinned
+        self.response = response
+        self._read_only = False
+        self._body_started = 0.0
+
+    def read_only(self) -> "SqlModelUnitOfWork":
+        """
+        Marks the next unit as read only: it is never committed
+            async with self.uow.read_only():
+        :return: self
+        """
+        self._read_only = True
+        return self
+
+    def pin_to_primary(self):
+        """
+        Sends the following read only units of the request to the primary
+        :return: None
+        """
+        self.pinned = True
+
+    def _pin_client(self):
+        # Read your writes: next requests of the client read from the primary
+        self.pin_to_primary()
+        if self.response is None or not settings.POSTGRES_READ_YOUR_WRITES_IN_SECONDS:
+            return
+        self.response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(time.time() + settings.POSTGRES_READ_YOUR_WRITES_IN_SECONDS),
+            max_age=settings.POSTGRES_READ_YOUR_WRITES_IN_SECONDS,
+            httponly=True,
+        )
+
+    @property
+    def timings(self) -> dict[str, TimingStats]:
+        return UOW_TIMINGS["read" if self._read_only else "write"]
 
     async def __aenter__(self, *args):
+        with self.timings["begin"].measure():
+            if self._read_only:
+                if not self.pinned:
+                    self.session.sync_session.replica = next_replica()
+                await self.session.connection(execution_options=read_only_options())
+            else:
+                await self.session.connection()
+        self._body_started = time.perf_counter()
         return self
 
-    async def __aexit__(self, *args):
+    async def __aexit__(self, exc_type, *args):
+        timings = self.timings
+        timings["body"].add(time.perf_counter() - self._body_started)
         try:
-            await self.session.commit()
-        except Exception:
-            await self.session.rollback()
+            with timings["commit"].measure():
+                try:
+                    if exc_type is None and not self._read_only:
+                        await self.session.commit()
+                        if settings.POSTGRES_REPLICA_URLS:
+                            self._pin_client()
+                finally:
+                    # Rolls back failed and read only units,
+                    # failed commit is raised to the caller
+                    await self.session.close()
         finally:
-            await self.session.close()
+            self._read_only = False
+            self.session.sync_session.replica = None
+
+
+def get_uow_stats() -> dict:
+    return {
+        kind: {phase: stats.as_dict() for phase, stats in timings.items()}
+        for kind, timings in UOW_TIMINGS.items()
+    }
+
+
+async def get_uow(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+) -> SqlModelUnitOfWork:
+    """
+    Request scoped unit of work. FastAPI resolves it once per request,
+    services built on it must not outlive the request:
+    the session is closed when the response is sent
+    :param request: read your writes cookie is read from it
+    :param response: and set to it
+    :param session:
+    :return: SqlModelUnitOfWork
+    """
+    return SqlModelUnitOfWork(
+        session, pinned=pinned_to_primary(request), response=response
+    )
@@ -4,8 +4,13 @@ from fastapi import FastAPI
 from api.v1.resources.data import router as data_router
 from api.v1.resources.dishes import router as dishes_router
 from api.v1.resources.menus import router as menus_router
+from api.v1.resources.metrics import router as metrics_router
 from api.v1.resources.submenus import router as submenus_router
 from core.config import get_settings
+from core.responses import FastJSONResponse
+from db.cache import base as cache_base
+from db.cache.RedisCache import create_redis_cache
+from db.cache.TieredCache import create_tiered_cache
 
 settings = get_settings()
 
@@ -15,6 +20,7 @@ app = FastAPI(
     redoc_url=f"{settings.API_V1_STR}/redoc",
     # Адрес документации в формате OpenAPI
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
 
@@ -33,6 +39,21 @@ async def shutdown_db_client():
     pass
 
 
+@app.on_event("startup")
+async def startup_cache_client():
+    if settings.CACHE_LOCAL_ENABLED:
+        cache_base.cache = create_tiered_cache(settings)
+    else:
+        cache_base.cache = create_redis_cache(settings)
+
+
+@app.on_event("shutdown")
+async def shutdown_cache_client():
+    if cache_base.cache is not None:
+        await cache_base.cache.close()
+        cache_base.cache = None
+
+
 submenus_router.include_router(
     router=dishes_router,
     prefix="/{submenu_id}/dishes",
@@ -46,6 +67,8 @@ app.include_router(router=menus_router, prefix=f"{settings.API_V1_STR}/menus")
 
 app.include_router(router=data_router, prefix=f"{settings.API_V1_STR}/data")
 
+app.include_router(router=metrics_router, prefix=f"{settings.API_V1_STR}/metrics")
+
 if __name__ == "__main__":
     # Приложение может запускаться командой
     # `uvicorn main:app --host 0.0.0.0 --port 8000`
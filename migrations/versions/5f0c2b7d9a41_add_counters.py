@@ -0,0 +1,79 @@
+"""add submenus and dishes counters
+
+Revision ID: 5f0c2b7d9a41
+Revises: 1526308a0c00
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5f0c2b7d9a41"
+down_revision = "1526308a0c00"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "menu",
+        sa.Column(
+            "submenus_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "menu",
+        sa.Column(
+            "dishes_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "submenu",
+        sa.Column(
+            "dishes_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    # Backfill counters for existing rows
+    op.execute(
+        """
+        UPDATE submenu
+        SET dishes_count = counts.dishes_count
+        FROM (
+            SELECT submenu_id, count(*) AS dishes_count
+            FROM dish
+            GROUP BY submenu_id
+        ) AS counts
+        WHERE submenu.id = counts.submenu_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE menu
+        SET submenus_count = counts.submenus_count,
+            dishes_count = counts.dishes_count
+        FROM (
+            SELECT menu_id,
+                   count(*) AS submenus_count,
+                   sum(dishes_count) AS dishes_count
+            FROM submenu
+            GROUP BY menu_id
+        ) AS counts
+        WHERE menu.id = counts.menu_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("submenu", "dishes_count")
+    op.drop_column("menu", "dishes_count")
+    op.drop_column("menu", "submenus_count")
@@ -0,0 +1,45 @@
+"""replace primary key indexes with foreign key covering indexes
+
+Revision ID: 9b3e6a1c4d27
+Revises: 5f0c2b7d9a41
+Create Date: 2026-10-18 11:02:15.774310
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b3e6a1c4d27"
+down_revision = "5f0c2b7d9a41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Primary keys are already indexed by their constraints
+    op.drop_index("ix_dish_id", table_name="dish")
+    op.drop_index("ix_submenu_id", table_name="submenu")
+    op.drop_index("ix_menu_id", table_name="menu")
+
+    op.create_index(
+        "ix_submenu_menu_id",
+        "submenu",
+        ["menu_id"],
+        unique=False,
+        postgresql_include=["id", "title", "description", "dishes_count"],
+    )
+    op.create_index(
+        "ix_dish_submenu_id",
+        "dish",
+        ["submenu_id"],
+        unique=False,
+        postgresql_include=["id", "title", "description", "price"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dish_submenu_id", table_name="dish")
+    op.drop_index("ix_submenu_menu_id", table_name="submenu")
+
+    op.create_index("ix_menu_id", "menu", ["id"], unique=False)
+    op.create_index("ix_submenu_id", "submenu", ["id"], unique=False)
+    op.create_index("ix_dish_id", "dish", ["id"], unique=False)
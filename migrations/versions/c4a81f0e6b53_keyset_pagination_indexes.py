@@ -0,0 +1,54 @@
+"""order foreign key covering indexes by id for keyset pagination
+
+Revision ID: c4a81f0e6b53
+Revises: 9b3e6a1c4d27
+Create Date: 2026-10-18 13:40:51.208613
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4a81f0e6b53"
+down_revision = "9b3e6a1c4d27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_dish_submenu_id", table_name="dish")
+    op.drop_index("ix_submenu_menu_id", table_name="submenu")
+
+    op.create_index(
+        "ix_submenu_menu_id",
+        "submenu",
+        ["menu_id", "id"],
+        unique=False,
+        postgresql_include=["title", "description", "dishes_count"],
+    )
+    op.create_index(
+        "ix_dish_submenu_id",
+        "dish",
+        ["submenu_id", "id"],
+        unique=False,
+        postgresql_include=["title", "description", "price"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dish_submenu_id", table_name="dish")
+    op.drop_index("ix_submenu_menu_id", table_name="submenu")
+
+    op.create_index(
+        "ix_submenu_menu_id",
+        "submenu",
+        ["menu_id"],
+        unique=False,
+        postgresql_include=["id", "title", "description", "dishes_count"],
+    )
+    op.create_index(
+        "ix_dish_submenu_id",
+        "dish",
+        ["submenu_id"],
+        unique=False,
+        postgresql_include=["id", "title", "description", "price"],
+    )
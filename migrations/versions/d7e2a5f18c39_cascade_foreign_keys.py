@@ -0,0 +1,48 @@
+"""cascade deletes of submenus and dishes by foreign keys
+
+Revision ID: d7e2a5f18c39
+Revises: c4a81f0e6b53
+Create Date: 2026-10-18 15:12:37.480215
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d7e2a5f18c39"
+down_revision = "c4a81f0e6b53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_constraint("dish_submenu_id_fkey", "dish", type_="foreignkey")
+    op.drop_constraint("submenu_menu_id_fkey", "submenu", type_="foreignkey")
+
+    op.create_foreign_key(
+        "submenu_menu_id_fkey",
+        "submenu",
+        "menu",
+        ["menu_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "dish_submenu_id_fkey",
+        "dish",
+        "submenu",
+        ["submenu_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("dish_submenu_id_fkey", "dish", type_="foreignkey")
+    op.drop_constraint("submenu_menu_id_fkey", "submenu", type_="foreignkey")
+
+    op.create_foreign_key(
+        "submenu_menu_id_fkey", "submenu", "menu", ["menu_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "dish_submenu_id_fkey", "dish", "submenu", ["submenu_id"], ["id"]
+    )
@@ -1,15 +1,31 @@
 import uuid as uuid_pkg
 
 from pydantic import condecimal
+from sqlalchemy import Column, ForeignKey, Index
 from sqlmodel import Field, Relationship
+from sqlmodel.sql.sqltypes import GUID
 
 from models.submenu import Submenu
 from models.uuid import UUIDModel
 
 
 class Dish(UUIDModel, table=True):
+    # Covers dishes list pages of a submenu ordered by id, index only scan
+    __table_args__ = (
+        Index(
+            "ix_dish_submenu_id",
+            "submenu_id",
+            "id",
+            postgresql_include=["title", "description", "price"],
+        ),
+    )
+
     title: str
     description: str
     price: condecimal(decimal_places=2) = Field(default=0)
-    submenu_id: uuid_pkg.UUID = Field(foreign_key="submenu.id")
+    submenu_id: uuid_pkg.UUID = Field(
+        sa_column=Column(
+            GUID(), ForeignKey("submenu.id", ondelete="CASCADE"), nullable=False
+        )
+    )
     submenu: Submenu = Relationship(back_populates="dishes")
@@ -1,6 +1,7 @@
 from typing import Optional
 
-from sqlmodel import Relationship
+from sqlalchemy import text
+from sqlmodel import Field, Relationship
 
 from models.uuid import UUIDModel
 
@@ -8,7 +9,15 @@ from models.uuid import UUIDModel
 class Menu(UUIDModel, table=True):
     title: str
     description: str
+    # Maintained by submenu/dish repositories on create and delete
+    submenus_count: int = Field(
+        default=0, sa_column_kwargs={"server_default": text("0")}
+    )
+    dishes_count: int = Field(default=0, sa_column_kwargs={"server_default": text("0")})
     submenus: Optional[list["Submenu"]] = Relationship(
         back_populates="menu",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        },
     )
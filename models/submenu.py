@@ -1,18 +1,40 @@
 import uuid as uuid_pkg
 from typing import Optional
 
+from sqlalchemy import Column, ForeignKey, Index, text
 from sqlmodel import Field, Relationship
+from sqlmodel.sql.sqltypes import GUID
 
 from models.menu import Menu
 from models.uuid import UUIDModel
 
 
 class Submenu(UUIDModel, table=True):
+    # Covers submenus list pages of a menu ordered by id, index only scan
+    __table_args__ = (
+        Index(
+            "ix_submenu_menu_id",
+            "menu_id",
+            "id",
+            postgresql_include=["title", "description", "dishes_count"],
+        ),
+    )
+
     title: str
     description: str
-    menu_id: uuid_pkg.UUID = Field(foreign_key="menu.id")
+    # Maintained by dish repository on create and delete
+    dishes_count: int = Field(default=0, sa_column_kwargs={"server_default": text("0")})
+    menu_id: uuid_pkg.UUID = Field(
+        sa_column=Column(
+            GUID(), ForeignKey("menu.id", ondelete="CASCADE"), nullable=False
+        )
+    )
     menu: Menu = Relationship(back_populates="submenus")
+    # Foreign keys cascade deletes in the database, ORM doesn't load children
     dishes: Optional[list["Dish"]] = Relationship(
         back_populates="submenu",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        },
     )
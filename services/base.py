@@ -1,23 +1,170 @@
-from abc import ABC, abstractmethod
-from typing import Union
+import asyncio
+import time
+import uuid as uuid_pkg
+from abc import ABC
+from collections.abc import Sequence
+from typing import Awaitable, Callable, Optional, Union
 
+from fastapi import HTTPException
 from pydantic.types import UUID
 
+from core.config import get_settings
 from db.cache.base import AbstractCache
 from db.uow import SqlModelUnitOfWork
 
+settings = get_settings()
+
 
 class ServiceBase(ABC):
+    # Cache loads running in this worker, shared by all requests
+    _in_flight: dict[str, asyncio.Future] = {}
+
     def __init__(self, cache: AbstractCache, uow: SqlModelUnitOfWork):
         self.cache = cache
         self.uow = uow
 
-    @property
-    @abstractmethod
-    def cache_list_key(self) -> Union[str, UUID]:
-        pass
+    async def get_cached(
+        self,
+        key: Union[str, UUID],
+        loader: Callable[[], Awaitable[bytes]],
+        field: Optional[str] = None,
+        tags: Sequence[str] = (),
+    ) -> Union[bytes, str]:
+        """
+        Returns cached value, on cache miss only one caller runs loader:
+        concurrent requests of this worker await the same future,
+        other workers wait for the Redis lock holder.
+        If the loading request is cancelled, a waiter takes over the load.
+        With CACHE_STALE_WHILE_REVALIDATE waiters get the previous value
+        :param key:
+        :param loader: coroutine function returning value to cache
+        :param field: field of hash ``key``, e.g. page of a list
+        :param tags: tags of the nodes value depends on, see db.cache.keys.
+            Their generations are appended to the key
+        :return: cached value
+        """
+        key = str(key)
+        stale_key = self.stale_key(key)
+        if tags:
+            versions = await self.cache.get_generations(tags)
+            key = f"{key}@{'.'.join(map(str, versions))}"
+        if (value := await self._cache_get(key, field)) is not None:
+            return value
+
+        flight_key = key if field is None else f"{key}:{field}"
+        while (future := self._in_flight.get(flight_key)) is not None:
+            if (stale := await self._get_stale(stale_key, field)) is not None:
+                return stale
+            # Unlike awaiting the future, wait raises only on cancellation
+            # of this request
+            await asyncio.wait({future})
+            if not future.cancelled():
+                return future.result()
+            # Loading request was cancelled, one of waiters loads the value
+
+        # Registered with no await after the check above, so concurrent
+        # misses of this worker never start a second load
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = future
+        try:
+            value = await self._load_with_lock(key, field, stale_key, tags, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark exception as retrieved, there might be no waiters
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            if self._in_flight.get(flight_key) is future:
+                del self._in_flight[flight_key]
+        return value
+
+    async def _load_with_lock(
+        self,
+        key: str,
+        field: Optional[str],
+        stale_key: str,
+        tags: Sequence[str],
+        loader: Callable[[], Awaitable[bytes]],
+    ) -> Union[bytes, str]:
+        if tags and await self.cache.recently_written(tags):
+            # Replicas may lag behind the write, shared value is loaded from
+            # the primary
+            self.uow.pin_to_primary()
+
+        lock_key = f"lock:{key}" if field is None else f"lock:{key}:{field}"
+        # Lock is released only by its owner, it may expire while loading
+        lock_token = uuid_pkg.uuid4().hex
+        deadline = time.monotonic() + settings.CACHE_LOCK_EXPIRE_IN_SECONDS
+        while not await self.cache.set_if_not_exists(
+            lock_key, lock_token, expire=settings.CACHE_LOCK_EXPIRE_IN_SECONDS
+        ):
+            # Another worker is loading the value
+            if (stale := await self._get_stale(stale_key, field)) is not None:
+                return stale
+            await asyncio.sleep(settings.CACHE_LOCK_POLL_INTERVAL_IN_SECONDS)
+            if (value := await self._cache_get(key, field)) is not None:
+                return value
+            if time.monotonic() > deadline:
+                # Lock holder is too slow, don't wait any longer
+                return await loader()
+
+        try:
+            value = await loader()
+            await self._cache_set(key, field, value, tags=tags)
+            if settings.CACHE_STALE_WHILE_REVALIDATE:
+                await self._cache_set(
+                    stale_key,
+                    field,
+                    value,
+                    expire=settings.CACHE_STALE_EXPIRE_IN_SECONDS,
+                )
+        finally:
+            await self.cache.delete_if_equals(lock_key, lock_token)
+        return value
+
+    async def _get_stale(
+        self, stale_key: str, field: Optional[str]
+    ) -> Optional[Union[bytes, str]]:
+        if not settings.CACHE_STALE_WHILE_REVALIDATE:
+            return None
+        return await self._cache_get(stale_key, field)
+
+    async def _cache_get(
+        self, key: str, field: Optional[str]
+    ) -> Optional[Union[bytes, str]]:
+        if field is None:
+            return await self.cache.get(key)
+        return await self.cache.get_field(key, field)
+
+    async def _cache_set(
+        self,
+        key: str,
+        field: Optional[str],
+        value: Union[bytes, str],
+        expire: int = settings.REDIS_CACHE_EXPIRE_IN_SECONDS,
+        tags: Sequence[str] = (),
+    ):
+        if field is None:
+            await self.cache.set(key, value, expire=expire, tags=tags)
+        else:
+            await self.cache.set_field(key, field, value, expire=expire, tags=tags)
+
+    @staticmethod
+    def check_unique(ids: Sequence[UUID]):
+        """
+        Batch must not address the same object twice
+        :param ids:
+        :return: None
+        """
+        if len(set(ids)) != len(ids):
+            raise HTTPException(status_code=422, detail="duplicate ids in batch")
 
-    @property
-    @abstractmethod
-    def cache_list_keys_to_clear(self) -> list[Union[str, UUID]]:
-        pass
+    @staticmethod
+    def stale_key(key: str) -> str:
+        # Not versioned: previous value outlives invalidation
+        return f"stale:{key}"
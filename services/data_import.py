@@ -0,0 +1,226 @@
+import codecs
+import json
+import re
+import uuid as uuid_pkg
+from collections.abc import Iterator
+from decimal import Decimal
+from typing import IO, Optional
+
+from openpyxl import load_workbook
+from pydantic import ValidationError
+
+from api.v1.schemas.dishes import DishBase
+from api.v1.schemas.menus import MenuBase
+from api.v1.schemas.submenus import SubmenuBase
+
+JSON_MEDIA_TYPE = "application/json"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class DataImportError(ValueError):
+    pass
+
+
+def iter_json_menus(file: IO[bytes]) -> Iterator[dict]:
+    """
+    Reads menus in the same format as db.test_data.TEST_DATA,
+    either a list of menus or {"menus": [...]}.
+    File is parsed incrementally, menu by menu: memory is bounded
+    by the largest single menu, not by the whole upload
+    :param file:
+    :return: menus iterator
+    """
+    reader = _JsonReader(file)
+    try:
+        if reader.peek() == "{":
+            reader.skip_to_key("menus")
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.value()
+            if reader.peek() == "]":
+                return
+            reader.expect(",")
+    except ValueError as exc:
+        raise DataImportError(f"invalid json: {exc}") from exc
+
+
+class _JsonReader:
+    """
+    Pulls json values one by one out of a file read by chunks,
+    only the unparsed tail of the file is kept in the buffer
+    """
+
+    chunk_size = 64 * 1024
+    decoder = json.JSONDecoder()
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.file.read(self.chunk_size)
+        text = self.text_decoder.decode(chunk, final=not chunk)
+        pos, self.pos = self.pos, 0
+        self.buffer = self.buffer[pos:] + text
+        return bool(chunk)
+
+    def peek(self) -> str:
+        while True:
+            self.pos = JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r}, got {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # Value may be cut by the chunk end
+                if not self._fill():
+                    raise
+                continue
+            # So may be a number
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip_to_key(self, key: str):
+        self.expect("{")
+        while True:
+            found = self.value()
+            self.expect(":")
+            if found == key:
+                return
+            self.value()
+            self.expect(",")
+
+
+def iter_xlsx_menus(file: IO[bytes]) -> Iterator[dict]:
+    """
+    Reads menus in the layout of celery_worker data export:
+    menu rows start with its number, submenu rows with one empty cell
+    and dish rows with two empty cells. Sheet is read row by row
+    :param file:
+    :return: menus iterator
+    """
+    try:
+        workbook = load_workbook(file, read_only=True)
+    except Exception as exc:
+        raise DataImportError(f"invalid xlsx: {exc}") from exc
+    menu: Optional[dict] = None
+    try:
+        for row_num, row in enumerate(
+            workbook.active.iter_rows(values_only=True), start=1
+        ):
+            cells = ["" if cell is None else cell for cell in row]
+            if not any(cells):
+                continue
+            if len(cells) < 6:
+                cells.extend([""] * (6 - len(cells)))
+            if cells[0] != "":
+                if menu is not None:
+                    yield menu
+                menu = {
+                    "menu": {"title": cells[1], "description": cells[2]},
+                    "submenus": [],
+                }
+            elif menu is None:
+                raise DataImportError(f"row {row_num}: menu row is expected")
+            elif cells[1] != "":
+                menu["submenus"].append(
+                    {
+                        "submenu": {"title": cells[2], "description": cells[3]},
+                        "dishes": [],
+                    }
+                )
+            elif not menu["submenus"]:
+                raise DataImportError(f"row {row_num}: submenu row is expected")
+            else:
+                menu["submenus"][-1]["dishes"].append(
+                    {
+                        "title": cells[3],
+                        "description": cells[4],
+                        "price": str(cells[5]),
+                    }
+                )
+        if menu is not None:
+            yield menu
+    finally:
+        workbook.close()
+
+
+def flatten_menu(menu: dict) -> tuple[dict, list[dict], list[dict]]:
+    """
+    Validates menu tree and converts it to table rows
+    with generated ids and counters
+    :param menu:
+    :return: menu row, submenus rows, dishes rows
+    """
+    try:
+        return _flatten_menu(menu)
+    except (ValidationError, LookupError, TypeError, ArithmeticError) as exc:
+        raise DataImportError(f"invalid menu: {exc}") from exc
+
+
+def read_rows(
+    menus: Iterator[dict], max_rows: int
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """
+    Reads and flattens menus until there are at least max_rows rows
+    or menus are over. Blocking, run it in a thread pool
+    :param menus:
+    :param max_rows:
+    :return: menus rows, submenus rows, dishes rows
+    """
+    menu_rows: list[dict] = []
+    submenu_rows: list[dict] = []
+    dish_rows: list[dict] = []
+    pending = 0
+    while pending < max_rows:
+        menu = next(menus, None)
+        if menu is None:
+            break
+        menu_row, submenus, dishes = flatten_menu(menu)
+        menu_rows.append(menu_row)
+        submenu_rows.extend(submenus)
+        dish_rows.extend(dishes)
+        pending += 1 + len(submenus) + len(dishes)
+    return menu_rows, submenu_rows, dish_rows
+
+
+def _flatten_menu(menu: dict) -> tuple[dict, list[dict], list[dict]]:
+    menu_row = MenuBase(**menu["menu"]).dict()
+    menu_row["id"] = uuid_pkg.uuid4()
+    submenu_rows: list[dict] = []
+    dish_rows: list[dict] = []
+    for submenu in menu.get("submenus", []):
+        submenu_row = SubmenuBase(**submenu["submenu"]).dict()
+        submenu_row["id"] = uuid_pkg.uuid4()
+        submenu_row["menu_id"] = menu_row["id"]
+        dishes = submenu.get("dishes", [])
+        submenu_row["dishes_count"] = len(dishes)
+        submenu_rows.append(submenu_row)
+        for dish in dishes:
+            dish_row = DishBase(**dish).dict()
+            dish_row["id"] = uuid_pkg.uuid4()
+            dish_row["price"] = Decimal(dish_row["price"])
+            dish_row["submenu_id"] = submenu_row["id"]
+            dish_rows.append(dish_row)
+    menu_row["submenus_count"] = len(submenu_rows)
+    menu_row["dishes_count"] = len(dish_rows)
+    return menu_row, submenu_rows, dish_rows
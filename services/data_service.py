@@ -1,56 +1,119 @@
-from functools import lru_cache
+from collections.abc import AsyncIterator, Iterable
+from tempfile import SpooledTemporaryFile
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
-from api.v1.schemas.dishes import DishBase
-from api.v1.schemas.menus import MenuBase
-from api.v1.schemas.service import TestDataBase
-from api.v1.schemas.submenus import SubmenuBase
+from api.v1.schemas.service import CountersRepairBase, DataLoadBase, TestDataBase
 from db.cache.base import AbstractCache
+from db.cache.keys import MENUS_TAG, menu_tag
 from db.cache.RedisCache import get_redis_cache
-from db.db import get_session
 from db.test_data import TEST_DATA
-from db.uow import SqlModelUnitOfWork
+from db.uow import SqlModelUnitOfWork, get_uow
 from services.base import ServiceBase
+from services.data_import import (
+    JSON_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    DataImportError,
+    iter_json_menus,
+    iter_xlsx_menus,
+    read_rows,
+)
 
 
 class DataService(ServiceBase):
-    cache_list_key = ""
-    cache_list_keys_to_clear = ["menu-list"]
+    # Bigger uploads are spooled to disk
+    upload_max_memory_size = 10 * 1024 * 1024
 
     async def clear_cache(self):
-        await self.cache.delete_list_keys(self.cache_list_keys_to_clear)
+        await self.cache.invalidate_tags([MENUS_TAG])
 
     async def fill_db_with_test_data(self) -> TestDataBase:
-        for menu in TEST_DATA:
-            async with self.uow:
-                new_menu = await self.uow.menu_repo.create(MenuBase(**menu["menu"]))
-                menu_id = str(new_menu.id)
-
-            for submenu in menu["submenus"]:
-                async with self.uow:
-                    new_submenu = await self.uow.submenu_repo.create(
-                        submenu=SubmenuBase(menu_id=menu_id, **submenu["submenu"]),
-                        menu_id=menu_id,
-                    )
-                    submenu_id = str(new_submenu.id)
+        await self.load_menus(TEST_DATA)
+        return TestDataBase(push_test_data=True)
+
+    async def upload(
+        self, media_type: str, stream: AsyncIterator[bytes]
+    ) -> DataLoadBase:
+        """
+        Loads menus from JSON or XLSX request body.
+        Body is spooled to a temporary file chunk by chunk,
+        then menus are read from it one by one
+        :param media_type: request content type
+        :param stream: request body chunks
+        :return: DataLoadBase
+        """
+        if media_type == JSON_MEDIA_TYPE:
+            iter_menus = iter_json_menus
+        elif media_type == XLSX_MEDIA_TYPE:
+            iter_menus = iter_xlsx_menus
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"expected {JSON_MEDIA_TYPE} or {XLSX_MEDIA_TYPE}",
+            )
+
+        with SpooledTemporaryFile(max_size=self.upload_max_memory_size) as file:
+            async for chunk in stream:
+                file.write(chunk)
+            file.seek(0)
+            return await self.load_menus(iter_menus(file))
 
-                for dish in submenu["dishes"]:
-                    async with self.uow:
-                        await self.uow.dish_repo.create(
-                            dish=DishBase(submenu_id=submenu_id, **dish),
-                            submenu_id=submenu_id,
-                        )
+    async def load_menus(self, menus: Iterable[dict]) -> DataLoadBase:
+        """
+        Inserts all menus in one transaction.
+        Menus are read and flattened in a thread pool,
+        bulk_insert_chunk_size rows at a time, then flushed by multi-row inserts
+        :param menus: menu trees, see db.test_data.TEST_DATA
+        :return: DataLoadBase
+        """
+        menus_iter = iter(menus)
+        result = DataLoadBase(menus=0, submenus=0, dishes=0)
+        async with self.uow:
+            while True:
+                try:
+                    menu_rows, submenu_rows, dish_rows = await run_in_threadpool(
+                        read_rows,
+                        menus_iter,
+                        self.uow.data_repo.bulk_insert_chunk_size,
+                    )
+                except DataImportError as exc:
+                    raise HTTPException(status_code=422, detail=str(exc))
+                if not menu_rows:
+                    break
+                await self.uow.data_repo.bulk_insert(menu_rows, submenu_rows, dish_rows)
+                result.menus += len(menu_rows)
+                result.submenus += len(submenu_rows)
+                result.dishes += len(dish_rows)
 
         await self.clear_cache()
-        return TestDataBase(push_test_data=True)
+        return result
+
+    async def repair_counters(self) -> CountersRepairBase:
+        """
+        Fixes drift of denormalized submenus/dishes counters
+        and drops cached responses of repaired rows
+        :return: CountersRepairBase
+        """
+        async with self.uow:
+            (
+                repaired_submenus,
+                repaired_menus,
+            ) = await self.uow.data_repo.repair_counters()
+
+        menu_ids = {*repaired_menus}
+        menu_ids.update(menu_id for _, menu_id in repaired_submenus)
+        await self.cache.invalidate_tags(
+            [MENUS_TAG, *(menu_tag(menu_id) for menu_id in menu_ids)]
+        )
+        return CountersRepairBase(
+            repaired_menus=len(repaired_menus),
+            repaired_submenus=len(repaired_submenus),
+        )
 
 
-@lru_cache
 def get_data_service(
     cache: AbstractCache = Depends(get_redis_cache),
-    session: AsyncSession = Depends(get_session),
+    uow: SqlModelUnitOfWork = Depends(get_uow),
 ) -> DataService:
-    uow = SqlModelUnitOfWork(session)
     return DataService(cache=cache, uow=uow)
@@ -1,102 +1,154 @@
-from functools import lru_cache
-from typing import Optional
+from functools import partial
+from typing import Optional, Union
 
 from fastapi import Depends, HTTPException
 from pydantic.types import UUID
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.v1.schemas.dishes import DishBase, DishDetail, DishList, DishUpdate
+from api.v1.schemas.dishes import (
+    DishBase,
+    DishBatchUpdate,
+    DishDetail,
+    DishList,
+    DishUpdate,
+)
 from api.v1.schemas.service import DeleteBase
+from core.config import get_settings
+from core.encoders import dump_model
 from db.cache.base import AbstractCache
+from db.cache.keys import (
+    MENUS_TAG,
+    dish_key,
+    dish_list_key,
+    menu_tag,
+    menu_tree_tag,
+    submenu_tag,
+)
 from db.cache.RedisCache import get_redis_cache
-from db.db import get_session
-from db.uow import SqlModelUnitOfWork
+from db.uow import SqlModelUnitOfWork, get_uow
 from services.base import ServiceBase
+from services.pagination import (
+    decode_cursor,
+    pack_json_page,
+    pack_page,
+    page_cache_field,
+    paginate,
+    unpack_page,
+)
 
+settings = get_settings()
 
-class DishService(ServiceBase):
-    cache_list_key = "dish-list"
-    cache_list_keys_to_clear = ["menu-list"]
-
-    async def submenus_list_cache_key(self, menu_id: UUID) -> str:
-        """
-            As dish is related to one of submenus
-        :param menu_id:
-        :return:
-        """
-        return f"{str(menu_id)}_{self.cache_list_key}"
 
-    async def dishes_list_cache_key(self, menu_id: UUID, submenu_id: UUID) -> str:
-        return f"{str(menu_id)}_{str(submenu_id)}_{self.cache_list_key}"
+class DishService(ServiceBase):
+    @staticmethod
+    def dish_tags(menu_id: UUID, submenu_id: UUID) -> list[str]:
+        return [menu_tag(menu_id), submenu_tag(submenu_id)]
 
     async def clear_cache(
         self,
         menu_id: UUID,
         submenu_id: UUID,
-        dish_id: Optional[UUID] = None,
+        counters_changed: bool = True,
     ):
-        keys_to_clear = [menu_id, submenu_id]
-        if dish_id:
-            keys_to_clear.append(dish_id)
-        keys_to_clear.append(await self.submenus_list_cache_key(menu_id))
-        keys_to_clear.append(await self.dishes_list_cache_key(menu_id, submenu_id))
-        await self.cache.delete_list_keys(keys_to_clear)
-        await self.cache.delete_list_keys(self.cache_list_keys_to_clear)
-
-    async def submenu_exists(self, menu_id: UUID, submenu_id: UUID) -> bool:
         """
-        Checks that submenu with submenu_id exists inside menu with menu_id,
-        if not raises an exception
+        Create and delete change dishes counters of menus list, menu
+        and submenu, so the whole menu subtree is invalidated.
+        Update changes the submenu subtree and the menu tree only
         :param menu_id:
         :param submenu_id:
+        :param counters_changed:
         :return: None
         """
-        async with self.uow:
-            submenu = await self.uow.submenu_repo.get(menu_id, submenu_id)
-            if not submenu:
-                return False
-        return True
+        if counters_changed:
+            tags = [MENUS_TAG, menu_tag(menu_id)]
+        else:
+            tags = [submenu_tag(submenu_id), menu_tree_tag(menu_id)]
+        await self.cache.invalidate_tags(tags)
 
     async def create(
         self, dish: DishBase, menu_id: UUID, submenu_id: UUID
     ) -> DishDetail:
-        if not await self.submenu_exists(menu_id, submenu_id):
-            raise HTTPException(status_code=404, detail="submenu not found")
-
         async with self.uow:
-            new_dish = await self.uow.dish_repo.create(dish, submenu_id)
-            response = DishDetail(**new_dish.dict())
+            new_dish = await self.uow.dish_repo.create(dish, menu_id, submenu_id)
+            if not new_dish:
+                raise HTTPException(status_code=404, detail="submenu not found")
+            response = DishDetail.from_orm(new_dish)
         await self.clear_cache(menu_id, submenu_id)
         return response
 
-    async def get_list(self, menu_id: UUID, submenu_id: UUID) -> DishList:
-        # self.submenu_exists(menu_id, submenu_id) commented for postman test pass
-
-        dishes_list_cache_key = await self.dishes_list_cache_key(menu_id, submenu_id)
-        if cache_value := await self.cache.get(dishes_list_cache_key):
-            return DishList.parse_raw(cache_value)
-
-        async with self.uow:
-            dishes = await self.uow.dish_repo.list(menu_id, submenu_id)
+    async def get_list(
+        self,
+        menu_id: UUID,
+        submenu_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> tuple[str, Optional[str]]:
+        after = decode_cursor(cursor)
+
+        cache_value = await self.get_cached(
+            dish_list_key(menu_id, submenu_id),
+            partial(self.list_loader(), menu_id, submenu_id, limit, after),
+            field=page_cache_field(limit, cursor),
+            tags=self.dish_tags(menu_id, submenu_id),
+        )
+        return unpack_page(cache_value)
+
+    async def load_list(
+        self, menu_id: UUID, submenu_id: UUID, limit: int, after: Optional[UUID]
+    ) -> bytes:
+        async with self.uow.read_only():
+            dishes = await self.uow.dish_repo.list(
+                menu_id, submenu_id, limit + 1, after
+            )
+            dishes, next_cursor = paginate(dishes, limit)
             response = DishList.parse_obj(dishes)
+        return pack_page(dump_model(response), next_cursor)
 
-        await self.cache.set(dishes_list_cache_key, response.json())
-        return response
+    def list_loader(self):
+        return self.load_list_json if settings.POSTGRES_JSON_READS else self.load_list
+
+    async def load_list_json(
+        self, menu_id: UUID, submenu_id: UUID, limit: int, after: Optional[UUID]
+    ) -> bytes:
+        async with self.uow.read_only():
+            dishes, last_id = await self.uow.dish_repo.list_json(
+                menu_id, submenu_id, limit, after
+            )
+        return pack_json_page(dishes, last_id)
 
     async def get_detail(
         self, menu_id: UUID, submenu_id: UUID, dish_id: UUID
-    ) -> Optional[DishDetail]:
-        if cache_value := await self.cache.get(dish_id):
-            return DishDetail.parse_raw(cache_value)
-
-        async with self.uow:
+    ) -> Union[bytes, str]:
+        return await self.get_cached(
+            dish_key(menu_id, submenu_id, dish_id),
+            partial(self.detail_loader(), menu_id, submenu_id, dish_id),
+            tags=self.dish_tags(menu_id, submenu_id),
+        )
+
+    async def load_detail(
+        self, menu_id: UUID, submenu_id: UUID, dish_id: UUID
+    ) -> bytes:
+        async with self.uow.read_only():
             dish = await self.uow.dish_repo.get(menu_id, submenu_id, dish_id)
             if not dish:
                 raise HTTPException(status_code=404, detail="dish not found")
-            response = DishDetail(**dish.dict())
+            response = DishDetail.from_orm(dish)
+        return dump_model(response)
 
-        await self.cache.set(dish_id, response.json())
-        return response
+    def detail_loader(self):
+        if settings.POSTGRES_JSON_READS:
+            return self.load_detail_json
+        return self.load_detail
+
+    async def load_detail_json(
+        self, menu_id: UUID, submenu_id: UUID, dish_id: UUID
+    ) -> bytes:
+        async with self.uow.read_only():
+            dish = await self.uow.dish_repo.get_detail_json(
+                menu_id, submenu_id, dish_id
+            )
+            if not dish:
+                raise HTTPException(status_code=404, detail="dish not found")
+        return dish.encode()
 
     async def update(
         self,
@@ -114,8 +166,8 @@ class DishService(ServiceBase):
             )
             if not dish:
                 raise HTTPException(status_code=404, detail="dish not found")
-            response = DishDetail(**dish.dict())
-        await self.clear_cache(menu_id, submenu_id, dish_id)
+            response = DishDetail.from_orm(dish)
+        await self.clear_cache(menu_id, submenu_id, counters_changed=False)
         return response
 
     async def delete(
@@ -123,17 +175,76 @@ class DishService(ServiceBase):
     ) -> DeleteBase:
         async with self.uow:
             deleted = await self.uow.dish_repo.delete(menu_id, submenu_id, dish_id)
-        await self.clear_cache(menu_id, submenu_id, dish_id)
+        await self.clear_cache(menu_id, submenu_id)
         if deleted:
             return DeleteBase(deleted=deleted)
         else:
             raise HTTPException(status_code=404, detail="dish not found")
 
+    async def create_batch(
+        self, dishes: list[DishBase], menu_id: UUID, submenu_id: UUID
+    ) -> DishList:
+        """
+        Creates dishes in one statement with one cache invalidation
+        :param dishes:
+        :param menu_id:
+        :param submenu_id:
+        :return: created dishes
+        """
+        async with self.uow:
+            new_dishes = await self.uow.dish_repo.bulk_create(
+                dishes, menu_id, submenu_id
+            )
+            if not new_dishes:
+                raise HTTPException(status_code=404, detail="submenu not found")
+            response = DishList.parse_obj(new_dishes)
+        await self.clear_cache(menu_id, submenu_id)
+        return response
+
+    async def update_batch(
+        self, menu_id: UUID, submenu_id: UUID, dishes: list[DishBatchUpdate]
+    ) -> DishList:
+        """
+        Updates dishes in one transaction, nothing is updated
+        if any of them is not found
+        :param menu_id:
+        :param submenu_id:
+        :param dishes:
+        :return: updated dishes
+        """
+        self.check_unique([dish.id for dish in dishes])
+        async with self.uow:
+            updated = await self.uow.dish_repo.bulk_update(menu_id, submenu_id, dishes)
+            if len(updated) != len(dishes):
+                raise HTTPException(status_code=404, detail="dish not found")
+            response = DishList.parse_obj(updated)
+        await self.clear_cache(menu_id, submenu_id, counters_changed=False)
+        return response
+
+    async def delete_batch(
+        self, menu_id: UUID, submenu_id: UUID, dish_ids: list[UUID]
+    ) -> DeleteBase:
+        """
+        Deletes dishes in one transaction, nothing is deleted
+        if any of them is not found
+        :param menu_id:
+        :param submenu_id:
+        :param dish_ids:
+        :return: DeleteBase
+        """
+        self.check_unique(dish_ids)
+        async with self.uow:
+            deleted = await self.uow.dish_repo.bulk_delete(
+                menu_id, submenu_id, dish_ids
+            )
+            if deleted != len(dish_ids):
+                raise HTTPException(status_code=404, detail="dish not found")
+        await self.clear_cache(menu_id, submenu_id)
+        return DeleteBase(deleted=True)
+
 
-@lru_cache
 def get_dish_service(
     cache: AbstractCache = Depends(get_redis_cache),
-    session: AsyncSession = Depends(get_session),
+    uow: SqlModelUnitOfWork = Depends(get_uow),
 ) -> DishService:
-    uow = SqlModelUnitOfWork(session)
     return DishService(cache=cache, uow=uow)
@@ -1,65 +1,140 @@
-from functools import lru_cache
-from typing import Optional
+from functools import partial
+from typing import Optional, Union
 
 from fastapi import Depends, HTTPException
 from pydantic.types import UUID
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.v1.schemas.menus import MenuBase, MenuCreate, MenuDetail, MenuList, MenuUpdate
 from api.v1.schemas.service import DeleteBase
+from core.config import get_settings
+from core.encoders import dump_model
 from db.cache.base import AbstractCache
+from db.cache.keys import (
+    MENUS_TAG,
+    menu_key,
+    menu_list_key,
+    menu_tag,
+    menu_tree_key,
+    menu_tree_tag,
+)
 from db.cache.RedisCache import get_redis_cache
-from db.db import get_session
-from db.uow import SqlModelUnitOfWork
+from db.uow import SqlModelUnitOfWork, get_uow
 from services.base import ServiceBase
+from services.pagination import (
+    decode_cursor,
+    pack_json_page,
+    pack_page,
+    page_cache_field,
+    paginate,
+    unpack_page,
+)
 
+settings = get_settings()
 
-class MenuService(ServiceBase):
-    cache_list_key = "menu-list"
-    cache_list_keys_to_clear = ["menu-list"]
 
+class MenuService(ServiceBase):
     async def clear_cache(self, menu_id: Optional[UUID] = None):
+        tags = [MENUS_TAG]
         if menu_id:
-            await self.cache.delete(menu_id)
-        await self.cache.delete_list_keys(self.cache_list_keys_to_clear)
+            tags.append(menu_tag(menu_id))
+        await self.cache.invalidate_tags(tags)
 
     async def create(self, menu: MenuBase) -> MenuCreate:
         async with self.uow:
             new_menu = await self.uow.menu_repo.create(menu)
-            response = MenuCreate(**new_menu.dict())
+            response = MenuCreate.from_orm(new_menu)
         await self.clear_cache()
         return response
 
-    async def get_list(self) -> MenuList:
-        if cache_value := await self.cache.get(self.cache_list_key):
-            return MenuList.parse_raw(cache_value)
-
-        async with self.uow:
-            menus = await self.uow.menu_repo.list()
+    async def get_list(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> tuple[str, Optional[str]]:
+        """
+        Returns page of menus, pages are cached as fields of the list key
+        :param limit: page size
+        :param cursor: cursor of the page, None for the first one
+        :return: MenuList json and cursor of the next page
+        """
+        after = decode_cursor(cursor)
+        cache_value = await self.get_cached(
+            menu_list_key(),
+            partial(self.list_loader(), limit, after),
+            field=page_cache_field(limit, cursor),
+            tags=[MENUS_TAG],
+        )
+        return unpack_page(cache_value)
+
+    async def load_list(self, limit: int, after: Optional[UUID]) -> bytes:
+        async with self.uow.read_only():
+            menus = await self.uow.menu_repo.list(limit + 1, after)
+            menus, next_cursor = paginate(menus, limit)
             response: MenuList = MenuList.parse_obj(menus)
-
-        await self.cache.set(self.cache_list_key, response.json())
-        return response
-
-    async def get_detail(self, id: UUID) -> Optional[MenuDetail]:
-        if cache_value := await self.cache.get(id):
-            return MenuDetail.parse_raw(cache_value)
-
-        async with self.uow:
+        return pack_page(dump_model(response), next_cursor)
+
+    def list_loader(self):
+        return self.load_list_json if settings.POSTGRES_JSON_READS else self.load_list
+
+    async def load_list_json(self, limit: int, after: Optional[UUID]) -> bytes:
+        async with self.uow.read_only():
+            menus, last_id = await self.uow.menu_repo.list_json(limit, after)
+        return pack_json_page(menus, last_id)
+
+    async def get_detail(self, id: UUID) -> Union[bytes, str]:
+        """
+        :param id:
+        :return: MenuDetail json
+        """
+        return await self.get_cached(
+            menu_key(id),
+            partial(self.detail_loader(), id),
+            tags=[menu_tag(id)],
+        )
+
+    async def load_detail(self, id: UUID) -> bytes:
+        async with self.uow.read_only():
             menu = await self.uow.menu_repo.get_detail(id)
             if not menu:
                 raise HTTPException(status_code=404, detail="menu not found")
-            response: MenuDetail = MenuDetail.parse_obj(menu)
+            response: MenuDetail = MenuDetail.from_orm(menu)
+        return dump_model(response)
 
-        await self.cache.set(id, response.json())
-        return response
+    def detail_loader(self):
+        if settings.POSTGRES_JSON_READS:
+            return self.load_detail_json
+        return self.load_detail
+
+    async def load_detail_json(self, id: UUID) -> bytes:
+        async with self.uow.read_only():
+            menu = await self.uow.menu_repo.get_detail_json(id)
+            if not menu:
+                raise HTTPException(status_code=404, detail="menu not found")
+        return menu.encode()
+
+    async def get_tree(self, id: UUID) -> Union[bytes, str]:
+        """
+        :param id:
+        :return: MenuTree json
+        """
+        return await self.get_cached(
+            menu_tree_key(id),
+            partial(self.load_tree, id),
+            tags=[menu_tag(id), menu_tree_tag(id)],
+        )
+
+    async def load_tree(self, id: UUID) -> bytes:
+        # Json is built by the database as is
+        async with self.uow.read_only():
+            tree = await self.uow.menu_repo.get_tree(id)
+            if not tree:
+                raise HTTPException(status_code=404, detail="menu not found")
+        return tree.encode()
 
     async def update(self, id: UUID, update_menu: MenuUpdate) -> MenuCreate:
         async with self.uow:
             updated_menu = await self.uow.menu_repo.update(id, update_menu)
             if not updated_menu:
                 raise HTTPException(status_code=404, detail="menu not found")
-            response = MenuCreate(**updated_menu.dict())
+            response = MenuCreate.from_orm(updated_menu)
         await self.clear_cache(id)
         return response
 
@@ -73,10 +148,8 @@ class MenuService(ServiceBase):
             raise HTTPException(status_code=404, detail="menu not found")
 
 
-@lru_cache
 def get_menu_service(
     cache: AbstractCache = Depends(get_redis_cache),
-    session: AsyncSession = Depends(get_session),
+    uow: SqlModelUnitOfWork = Depends(get_uow),
 ) -> MenuService:
-    uow = SqlModelUnitOfWork(session)
     return MenuService(cache=cache, uow=uow)
@@ -0,0 +1,66 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Optional, Union
+
+from fastapi import HTTPException
+from pydantic.types import UUID
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(id: UUID) -> str:
+    """
+    Opaque cursor pointing after the row with given id
+    :param id:
+    :return: cursor
+    """
+    return urlsafe_b64encode(id.bytes).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[UUID]:
+    if cursor is None:
+        return None
+    try:
+        return UUID(bytes=urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def paginate(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """
+    Cuts rows fetched with limit + 1 to the page
+    :param rows: rows ordered by id
+    :param limit: page size
+    :return: page rows and cursor of the next page (None for the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id)
+
+
+def page_cache_field(limit: int, cursor: Optional[str]) -> str:
+    return f"{limit}:{cursor or ''}"
+
+
+def pack_page(body: bytes, next_cursor: Optional[str]) -> bytes:
+    # Cursor has no line breaks, so the first one ends it
+    return f"{next_cursor or ''}\n".encode() + body
+
+
+def pack_json_page(page: str, last_id: Optional[UUID]) -> bytes:
+    """
+    :param page: page json built by the database
+    :param last_id: id of the last row if there is a next page
+    :return: packed page, see pack_page
+    """
+    return pack_page(page.encode(), encode_cursor(last_id) if last_id else None)
+
+
+def unpack_page(value: Union[bytes, str]) -> tuple[str, Optional[str]]:
+    if isinstance(value, bytes):
+        value = value.decode()
+    next_cursor, _, body = value.partition("\n")
+    return body, next_cursor or None
@@ -1,49 +1,45 @@
-from functools import lru_cache
-from typing import Optional
+from functools import partial
+from typing import Optional, Union
 
 from fastapi import Depends, HTTPException
 from pydantic.types import UUID
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.v1.schemas.service import DeleteBase
 from api.v1.schemas.submenus import (
     SubmenuBase,
+    SubmenuBatchUpdate,
     SubmenuCreate,
     SubmenuDetail,
     SubmenuList,
     SubmenuUpdate,
 )
+from core.config import get_settings
+from core.encoders import dump_model
 from db.cache.base import AbstractCache
+from db.cache.keys import MENUS_TAG, menu_tag, submenu_key, submenu_list_key
 from db.cache.RedisCache import get_redis_cache
-from db.db import get_session
-from db.uow import SqlModelUnitOfWork
+from db.uow import SqlModelUnitOfWork, get_uow
 from services.base import ServiceBase
+from services.pagination import (
+    decode_cursor,
+    pack_json_page,
+    pack_page,
+    page_cache_field,
+    paginate,
+    unpack_page,
+)
 
+settings = get_settings()
 
-class SubmenuService(ServiceBase):
-    cache_list_key = "submenu-list"
-    cache_list_keys_to_clear = ["menu-list"]
 
-    async def submenus_list_cache_key(self, menu_id: UUID) -> str:
+class SubmenuService(ServiceBase):
+    async def clear_cache(self, menu_id: UUID):
         """
-            Returns cache key for submenus list in current menu
+        Invalidates menus list and whole subtree of the menu
         :param menu_id:
-        :return:
+        :return: None
         """
-        return f"{str(menu_id)}_{self.cache_list_key}"
-
-    async def clear_cache(
-        self,
-        menu_id: UUID,
-        submenu_id: Optional[UUID] = None,
-    ):
-        await self.cache.delete(menu_id)
-        if submenu_id:
-            await self.cache.delete(submenu_id)
-
-        submenus_list_cache_key = await self.submenus_list_cache_key(menu_id)
-        await self.cache.delete(submenus_list_cache_key)
-        await self.cache.delete_list_keys(self.cache_list_keys_to_clear)
+        await self.cache.invalidate_tags([MENUS_TAG, menu_tag(menu_id)])
 
     async def menu_exists(self, menu_id: UUID) -> bool:
         """
@@ -52,44 +48,66 @@ class SubmenuService(ServiceBase):
         :param menu_id:
         :return: None
         """
-        async with self.uow:
-            menu = await self.uow.menu_repo.get(menu_id)
+        async with self.uow.read_only():
+            menu = await self.uow.menu_repo.get_detail(menu_id)
             if not menu:
                 return False
         return True
 
     async def create(self, submenu: SubmenuBase, menu_id: UUID) -> SubmenuCreate:
-        if not await self.menu_exists(menu_id):
-            raise HTTPException(status_code=404, detail="menu not found")
-
         async with self.uow:
             new_submenu = await self.uow.submenu_repo.create(submenu, menu_id)
-            response = SubmenuCreate(**new_submenu.dict())
+            if not new_submenu:
+                raise HTTPException(status_code=404, detail="menu not found")
+            response = SubmenuCreate.from_orm(new_submenu)
         await self.clear_cache(menu_id=menu_id)
         return response
 
-    async def get_list(self, menu_id: UUID) -> SubmenuList:
+    async def get_list(
+        self, menu_id: UUID, limit: int, cursor: Optional[str] = None
+    ) -> tuple[str, Optional[str]]:
+        after = decode_cursor(cursor)
         if not await self.menu_exists(menu_id):
             raise HTTPException(status_code=404, detail="menu not found")
 
-        submenus_list_cache_key = await self.submenus_list_cache_key(menu_id)
-        if cache_value := await self.cache.get(submenus_list_cache_key):
-            return SubmenuList.parse_raw(cache_value)
-
-        async with self.uow:
-            submenus = await self.uow.submenu_repo.list(menu_id)
+        cache_value = await self.get_cached(
+            submenu_list_key(menu_id),
+            partial(self.list_loader(), menu_id, limit, after),
+            field=page_cache_field(limit, cursor),
+            tags=[menu_tag(menu_id)],
+        )
+        return unpack_page(cache_value)
+
+    async def load_list(
+        self, menu_id: UUID, limit: int, after: Optional[UUID]
+    ) -> bytes:
+        async with self.uow.read_only():
+            submenus = await self.uow.submenu_repo.list(menu_id, limit + 1, after)
+            submenus, next_cursor = paginate(submenus, limit)
             response = SubmenuList.parse_obj(submenus)
+        return pack_page(dump_model(response), next_cursor)
 
-        await self.cache.set(submenus_list_cache_key, response.json())
-        return response
+    def list_loader(self):
+        return self.load_list_json if settings.POSTGRES_JSON_READS else self.load_list
 
-    async def get_detail(
-        self, menu_id: UUID, submenu_id: UUID
-    ) -> Optional[SubmenuDetail]:
-        if cache_value := await self.cache.get(submenu_id):
-            return SubmenuDetail.parse_raw(cache_value)
+    async def load_list_json(
+        self, menu_id: UUID, limit: int, after: Optional[UUID]
+    ) -> bytes:
+        async with self.uow.read_only():
+            submenus, last_id = await self.uow.submenu_repo.list_json(
+                menu_id, limit, after
+            )
+        return pack_json_page(submenus, last_id)
 
-        async with self.uow:
+    async def get_detail(self, menu_id: UUID, submenu_id: UUID) -> Union[bytes, str]:
+        return await self.get_cached(
+            submenu_key(menu_id, submenu_id),
+            partial(self.detail_loader(), menu_id, submenu_id),
+            tags=[menu_tag(menu_id)],
+        )
+
+    async def load_detail(self, menu_id: UUID, submenu_id: UUID) -> bytes:
+        async with self.uow.read_only():
             submenu = await self.uow.submenu_repo.get_detail(
                 menu_id,
                 submenu_id,
@@ -99,9 +117,20 @@ class SubmenuService(ServiceBase):
                     status_code=404,
                     detail="submenu not found",
                 )
-            response = SubmenuDetail(**submenu)
-        await self.cache.set(submenu_id, response.json())
-        return response
+            response = SubmenuDetail.from_orm(submenu)
+        return dump_model(response)
+
+    def detail_loader(self):
+        if settings.POSTGRES_JSON_READS:
+            return self.load_detail_json
+        return self.load_detail
+
+    async def load_detail_json(self, menu_id: UUID, submenu_id: UUID) -> bytes:
+        async with self.uow.read_only():
+            submenu = await self.uow.submenu_repo.get_detail_json(menu_id, submenu_id)
+            if not submenu:
+                raise HTTPException(status_code=404, detail="submenu not found")
+        return submenu.encode()
 
     async def update(
         self, menu_id: UUID, submenu_id: UUID, update_submenu: SubmenuUpdate
@@ -117,24 +146,74 @@ class SubmenuService(ServiceBase):
                     status_code=404,
                     detail="submenu not found",
                 )
-            response = SubmenuCreate(**submenu.dict())
-        await self.clear_cache(menu_id=menu_id, submenu_id=submenu_id)
+            response = SubmenuCreate.from_orm(submenu)
+        await self.clear_cache(menu_id=menu_id)
         return response
 
     async def delete(self, menu_id: UUID, submenu_id: UUID) -> DeleteBase:
         async with self.uow:
             deleted = await self.uow.submenu_repo.delete(menu_id, submenu_id)
-        await self.clear_cache(menu_id=menu_id, submenu_id=submenu_id)
+        await self.clear_cache(menu_id=menu_id)
         if deleted:
             return DeleteBase(deleted=deleted)
         else:
             raise HTTPException(status_code=404, detail="menu not found")
 
+    async def create_batch(
+        self, submenus: list[SubmenuBase], menu_id: UUID
+    ) -> SubmenuList:
+        """
+        Creates submenus in one statement with one cache invalidation
+        :param submenus:
+        :param menu_id:
+        :return: created submenus
+        """
+        async with self.uow:
+            new_submenus = await self.uow.submenu_repo.bulk_create(submenus, menu_id)
+            if not new_submenus:
+                raise HTTPException(status_code=404, detail="menu not found")
+            response = SubmenuList.parse_obj(new_submenus)
+        await self.clear_cache(menu_id=menu_id)
+        return response
+
+    async def update_batch(
+        self, menu_id: UUID, submenus: list[SubmenuBatchUpdate]
+    ) -> SubmenuList:
+        """
+        Updates submenus in one transaction, nothing is updated
+        if any of them is not found
+        :param menu_id:
+        :param submenus:
+        :return: updated submenus
+        """
+        self.check_unique([submenu.id for submenu in submenus])
+        async with self.uow:
+            updated = await self.uow.submenu_repo.bulk_update(menu_id, submenus)
+            if len(updated) != len(submenus):
+                raise HTTPException(status_code=404, detail="submenu not found")
+            response = SubmenuList.parse_obj(updated)
+        await self.clear_cache(menu_id=menu_id)
+        return response
+
+    async def delete_batch(self, menu_id: UUID, submenu_ids: list[UUID]) -> DeleteBase:
+        """
+        Deletes submenus with their dishes in one transaction,
+        nothing is deleted if any of them is not found
+        :param menu_id:
+        :param submenu_ids:
+        :return: DeleteBase
+        """
+        self.check_unique(submenu_ids)
+        async with self.uow:
+            deleted = await self.uow.submenu_repo.bulk_delete(menu_id, submenu_ids)
+            if deleted != len(submenu_ids):
+                raise HTTPException(status_code=404, detail="submenu not found")
+        await self.clear_cache(menu_id=menu_id)
+        return DeleteBase(deleted=True)
+
 
-@lru_cache
 def get_submenu_service(
     cache: AbstractCache = Depends(get_redis_cache),
-    session: AsyncSession = Depends(get_session),
+    uow: SqlModelUnitOfWork = Depends(get_uow),
 ) -> SubmenuService:
-    uow = SqlModelUnitOfWork(session)
     return SubmenuService(cache=cache, uow=uow)
@@ -50,5 +50,8 @@ async def test_db():
 @pytest.mark.anyio
 @pytest.fixture(scope="function")
 async def test_client():
+    # AsyncClient doesn't run lifespan events, shared clients are created there
+    await app.router.startup()
     async with AsyncClient(app=app, base_url="http://") as client:
         yield client
+    await app.router.shutdown()
@@ -0,0 +1,43 @@
+import pytest
+from httpx import AsyncClient
+
+from db.cache.codecs import ZlibCodec
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+
+def test_zlib_codec_round_trip():
+    codec = ZlibCodec(min_size=1024, level=1)
+    small = b'[{"title": "My menu 1"}]'
+    large = small * 100
+
+    assert codec.encode(small) == small
+    encoded = codec.encode(large)
+    assert len(encoded) < len(large)
+    assert codec.decode(encoded) == large
+    assert codec.stats()["saved_bytes"] == len(large) - len(encoded)
+
+
+def test_zlib_codec_reads_plain_values():
+    # Values stored before compression was enabled
+    codec = ZlibCodec(min_size=1024, level=1)
+    assert codec.decode(b"[]") == b"[]"
+    assert codec.decode(b"cursor\n[]") == b"cursor\n[]"
+
+
+async def test_large_list_is_cached_compressed(test_client: AsyncClient, test_db):
+    base_url = app.url_path_for("create_menu")
+    for number in range(50):
+        new_menu = {
+            "title": f"My menu {number}",
+            "description": f"My menu description {number}",
+        }
+        await test_client.post(base_url, json=new_menu)
+
+    # Cache miss stores the page, cache hit decodes it
+    expected = (await test_client.get(base_url)).json()
+    assert (await test_client.get(base_url)).json() == expected
+
+    response = await test_client.get(app.url_path_for("cache_metrics"))
+    assert response.json()["codec"]["saved_bytes"] > 0
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from db.test_data import TEST_DATA
+from main import app
+from services.data_import import _JsonReader
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fill_db_with_test_data(test_client: AsyncClient, test_db):
+    url = app.url_path_for("fill_db_with_test_data")
+    response = await test_client.post(url)
+    assert response.status_code == 200
+    assert response.json() == {"push_test_data": True}
+
+    response = await test_client.get(app.url_path_for("list_menu"))
+    menus = response.json()
+    assert len(menus) == len(TEST_DATA)
+    assert sorted(menu["dishes_count"] for menu in menus) == [4, 5]
+    assert all(menu["submenus_count"] == 2 for menu in menus)
+
+
+async def test_upload_json(test_client: AsyncClient, test_db):
+    url = app.url_path_for("upload_data")
+    response = await test_client.post(
+        url,
+        content=json.dumps({"menus": TEST_DATA}),
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 201
+    assert response.json() == {"menus": 2, "submenus": 4, "dishes": 9}
+
+
+async def test_upload_json_by_chunks(test_client: AsyncClient, test_db, monkeypatch):
+    monkeypatch.setattr(_JsonReader, "chunk_size", 7)
+    url = app.url_path_for("upload_data")
+    response = await test_client.post(
+        url,
+        content=json.dumps({"version": 1, "menus": TEST_DATA}, indent=2),
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 201
+    assert response.json() == {"menus": 2, "submenus": 4, "dishes": 9}
+
+
+async def test_upload_invalid(test_client: AsyncClient, test_db):
+    url = app.url_path_for("upload_data")
+    response = await test_client.post(
+        url,
+        content=json.dumps([{"menu": {"title": "No description"}}]),
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 422
+
+    response = await test_client.get(app.url_path_for("list_menu"))
+    assert response.json() == []
+
+
+async def test_upload_unsupported_media_type(test_client: AsyncClient, test_db):
+    url = app.url_path_for("upload_data")
+    response = await test_client.post(
+        url, content="title,description", headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 415
@@ -3,8 +3,11 @@ from uuid import UUID
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
 
 from main import app
+from services import dish_service
+from tests.test_api.conftest import engine
 
 pytestmark = pytest.mark.anyio
 
@@ -251,3 +254,246 @@ async def test_patch_dish_invalid(test_client: AsyncClient, path_ids):
     }
     response = await test_client.patch(url, json=updated_dish)
     assert response.status_code == 404
+
+
+async def test_dishes_counters(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    response = await test_client.post(base_url, json=new_dish)
+    dish_id = response.json()["id"]
+
+    menu_url = app.url_path_for("get_menu", menu_id=path_ids["menu_id"])
+    submenu_url = app.url_path_for(
+        "get_submenu",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    response = await test_client.get(menu_url)
+    assert response.json()["submenus_count"] == 1
+    assert response.json()["dishes_count"] == 1
+    response = await test_client.get(submenu_url)
+    assert response.json()["dishes_count"] == 1
+
+    url = app.url_path_for(
+        "delete_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+        dish_id=dish_id,
+    )
+    await test_client.delete(url)
+
+    response = await test_client.get(menu_url)
+    assert response.json()["dishes_count"] == 0
+    response = await test_client.get(submenu_url)
+    assert response.json()["dishes_count"] == 0
+
+
+async def test_patch_dish_invalidates_cache(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    response = await test_client.post(base_url, json=new_dish)
+    dish_id = response.json()["id"]
+    url = app.url_path_for(
+        "get_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+        dish_id=dish_id,
+    )
+    # Cache list and detail
+    await test_client.get(base_url)
+    await test_client.get(url)
+
+    await test_client.patch(url, json={"title": "updated My dish 1"})
+
+    response = await test_client.get(base_url)
+    assert response.json()[0]["title"] == "updated My dish 1"
+    response = await test_client.get(url)
+    assert response.json()["title"] == "updated My dish 1"
+
+
+async def test_dish_batch(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish_batch",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dishes = [
+        {
+            "title": f"My dish {number}",
+            "description": f"My dish description {number}",
+            "price": 12.50,
+        }
+        for number in range(3)
+    ]
+    response = await test_client.post(base_url, json=new_dishes)
+    assert response.status_code == 201
+    dish_ids = [dish["id"] for dish in response.json()]
+    assert len(dish_ids) == 3
+
+    updated_dishes = [{"id": dish_id, "price": 14.50} for dish_id in dish_ids[:2]]
+    response = await test_client.patch(base_url, json=updated_dishes)
+    assert response.status_code == 200
+    assert all(math.isclose(float(dish["price"]), 14.5) for dish in response.json())
+
+    response = await test_client.request("DELETE", base_url, json=dish_ids[1:])
+    assert response.status_code == 200
+    assert response.json() == {"deleted": True}
+
+    list_url = app.url_path_for(
+        "list_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    response = await test_client.get(list_url)
+    assert [dish["id"] for dish in response.json()] == dish_ids[:1]
+    assert math.isclose(float(response.json()[0]["price"]), 14.5)
+    menu_url = app.url_path_for("get_menu", menu_id=path_ids["menu_id"])
+    response = await test_client.get(menu_url)
+    assert response.json()["dishes_count"] == 1
+
+
+async def test_dish_batch_invalid(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish_batch",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    response = await test_client.post(base_url, json=[new_dish])
+    dish_id = response.json()[0]["id"]
+    missing_id = dish_id[:-5] + "1" * 5
+
+    # Whole batch is rolled back
+    updated_dishes = [
+        {"id": dish_id, "title": "updated My dish 1"},
+        {"id": missing_id, "title": "updated My dish 2"},
+    ]
+    response = await test_client.patch(base_url, json=updated_dishes)
+    assert response.status_code == 404
+    response = await test_client.patch(base_url, json=[updated_dishes[0]] * 2)
+    assert response.status_code == 422
+    response = await test_client.post(base_url, json=[])
+    assert response.status_code == 422
+
+    url = app.url_path_for(
+        "get_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+        dish_id=dish_id,
+    )
+    response = await test_client.get(url)
+    assert response.json()["title"] == "My dish 1"
+
+
+async def test_patch_dish_of_other_menu(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    response = await test_client.post(base_url, json=new_dish)
+    dish_id = response.json()["id"]
+
+    response = await test_client.post(
+        app.url_path_for("create_menu"),
+        json={"title": "My menu 2", "description": "My menu description 2"},
+    )
+    url = app.url_path_for(
+        "update_dish",
+        menu_id=response.json()["id"],
+        submenu_id=path_ids["submenu_id"],
+        dish_id=dish_id,
+    )
+    response = await test_client.patch(url, json={"title": "updated My dish 1"})
+    assert response.status_code == 404
+    response = await test_client.patch(url, json={})
+    assert response.status_code == 404
+
+
+async def test_dish_json_reads(test_client: AsyncClient, path_ids, monkeypatch):
+    base_url = app.url_path_for(
+        "create_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    for number in range(3):
+        new_dish = {
+            "title": f"My dish {number}",
+            "description": f"My dish description {number}",
+            "price": 12.5,
+        }
+        response = await test_client.post(base_url, json=new_dish)
+    url = app.url_path_for(
+        "get_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+        dish_id=response.json()["id"],
+    )
+    list_response = await test_client.get(base_url, params={"limit": 2})
+    detail_response = await test_client.get(url)
+
+    # Drop cached responses, next reads load json built by Postgres
+    await test_client.patch(url, json={"title": "My dish 2"})
+    monkeypatch.setattr(dish_service.settings, "POSTGRES_JSON_READS", True)
+
+    response = await test_client.get(base_url, params={"limit": 2})
+    assert response.json() == list_response.json()
+    assert response.headers["X-Next-Cursor"] == list_response.headers["X-Next-Cursor"]
+    response = await test_client.get(url)
+    assert response.json() == detail_response.json()
+
+
+async def test_repair_counters(test_client: AsyncClient, path_ids):
+    base_url = app.url_path_for(
+        "create_dish",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    await test_client.post(base_url, json=new_dish)
+    repair_url = app.url_path_for("repair_counters")
+    response = await test_client.post(repair_url)
+    assert response.json() == {"repaired_menus": 0, "repaired_submenus": 0}
+
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE submenu SET dishes_count = 5"))
+        await conn.execute(text("UPDATE menu SET submenus_count = 3"))
+    response = await test_client.post(repair_url)
+    assert response.json() == {"repaired_menus": 1, "repaired_submenus": 1}
+
+    submenu_url = app.url_path_for(
+        "get_submenu",
+        menu_id=path_ids["menu_id"],
+        submenu_id=path_ids["submenu_id"],
+    )
+    response = await test_client.get(submenu_url)
+    assert response.json()["dishes_count"] == 1
@@ -161,3 +161,112 @@ async def test_patch_menu_invalid(test_client: AsyncClient, test_db):
     }
     response = await test_client.patch(url, json=updated_menu)
     assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_menus_pagination(test_client: AsyncClient, test_db):
+    menu_ids = []
+    for number in range(3):
+        new_menu = {
+            "title": f"My menu {number}",
+            "description": f"My menu description {number}",
+        }
+        response = await test_client.post(base_url, json=new_menu)
+        menu_ids.append(response.json()["id"])
+    menu_ids.sort()
+
+    response = await test_client.get(base_url, params={"limit": 2})
+    assert response.status_code == 200
+    assert [menu["id"] for menu in response.json()] == menu_ids[:2]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await test_client.get(base_url, params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    assert [menu["id"] for menu in response.json()] == menu_ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = await test_client.get(base_url, params={"cursor": "not a cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_menu_tree(test_client: AsyncClient, test_db):
+    new_menu = {
+        "title": "My menu 1",
+        "description": "My menu description 1",
+    }
+    response = await test_client.post(base_url, json=new_menu)
+    menu_id = response.json()["id"]
+    url = app.url_path_for("create_submenu", menu_id=menu_id)
+    new_submenu = {
+        "title": "My submenu 1",
+        "description": "My submenu description 1",
+    }
+    response = await test_client.post(url, json=new_submenu)
+    submenu_id = response.json()["id"]
+    url = app.url_path_for("create_dish", menu_id=menu_id, submenu_id=submenu_id)
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": "12.50",
+    }
+    response = await test_client.post(url, json=new_dish)
+    dish_id = response.json()["id"]
+
+    tree_url = app.url_path_for("get_menu_tree", menu_id=menu_id)
+    response = await test_client.get(tree_url)
+    assert response.status_code == 200
+    expected_answer = {
+        "id": menu_id,
+        "submenus_count": 1,
+        "dishes_count": 1,
+        **new_menu,
+        "submenus": [
+            {
+                "id": submenu_id,
+                "dishes_count": 1,
+                **new_submenu,
+                "dishes": [{"id": dish_id, **new_dish}],
+            }
+        ],
+    }
+    assert response.json() == expected_answer
+
+    url = app.url_path_for(
+        "update_dish", menu_id=menu_id, submenu_id=submenu_id, dish_id=dish_id
+    )
+    await test_client.patch(url, json={"price": "13.50"})
+    response = await test_client.get(tree_url)
+    assert response.json()["submenus"][0]["dishes"][0]["price"] == "13.50"
+
+
+@pytest.mark.anyio
+async def test_menu_tree_invalid(test_client: AsyncClient, test_db):
+    url = app.url_path_for(
+        "get_menu_tree", menu_id="8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0"
+    )
+    response = await test_client.get(url)
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_unit_of_work_timings(test_client: AsyncClient, test_db):
+    metrics_url = app.url_path_for("db_metrics")
+    response = await test_client.get(metrics_url)
+    timings = response.json()["unit_of_work"]
+    reads, writes = timings["read"]["body"]["count"], timings["write"]["body"]["count"]
+
+    base_url = app.url_path_for("create_menu")
+    new_menu = {
+        "title": "My menu 1",
+        "description": "My menu description 1",
+    }
+    response = await test_client.post(base_url, json=new_menu)
+    url = app.url_path_for("get_menu", menu_id=response.json()["id"])
+    response = await test_client.get(url)
+    assert response.status_code == 200
+
+    response = await test_client.get(metrics_url)
+    timings = response.json()["unit_of_work"]
+    assert timings["read"]["body"]["count"] == reads + 1
+    assert timings["write"]["body"]["count"] == writes + 1
@@ -0,0 +1,88 @@
+import functools
+import os
+import resource
+
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from services.data_service import get_data_service
+from services.dish_service import get_dish_service
+from services.menu_service import get_menu_service
+from services.submenu_service import get_submenu_service
+
+pytestmark = pytest.mark.anyio
+
+# Set LOAD_TEST_REQUESTS=1000000 for the full run
+LOAD_TEST_REQUESTS = int(os.getenv("LOAD_TEST_REQUESTS", 2000))
+WARMUP_REQUESTS = 200
+MAX_RSS_GROWTH_IN_BYTES = 20 * 1024 * 1024
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * resource.getpagesize()
+
+
+MENU_ID = "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a0"
+SUBMENU_ID = "8bfd01b6-2a5e-4a91-b5aa-00adeb3780a1"
+
+
+@pytest.mark.parametrize(
+    "service_factory, method, route, path_params",
+    [
+        (get_menu_service, "GET", "list_menu", {}),
+        (get_submenu_service, "GET", "list_submenu", {"menu_id": MENU_ID}),
+        (
+            get_dish_service,
+            "GET",
+            "list_dish",
+            {"menu_id": MENU_ID, "submenu_id": SUBMENU_ID},
+        ),
+        (get_data_service, "POST", "repair_counters", {}),
+    ],
+)
+async def test_service_is_request_scoped(
+    test_client: AsyncClient, service_factory, method, route, path_params
+):
+    services = []
+
+    # Same dependencies as the factory, see inspect.signature
+    @functools.wraps(service_factory)
+    def recording_factory(**dependencies):
+        service = service_factory(**dependencies)
+        services.append(service)
+        return service
+
+    app.dependency_overrides[service_factory] = recording_factory
+    try:
+        url = app.url_path_for(route, **path_params)
+        for _ in range(2):
+            await test_client.request(method, url)
+    finally:
+        del app.dependency_overrides[service_factory]
+
+    first, second = services
+    assert first is not second
+    assert first.uow is not second.uow
+    assert first.uow.session is not second.uow.session
+
+
+async def test_rss_is_flat_under_load(test_client: AsyncClient):
+    base_url = app.url_path_for("list_menu")
+    new_menu = {
+        "title": "My menu 1",
+        "description": "My menu description 1",
+    }
+    await test_client.post(base_url, json=new_menu)
+
+    for _ in range(WARMUP_REQUESTS):
+        await test_client.get(base_url)
+    rss_before = current_rss()
+
+    for _ in range(LOAD_TEST_REQUESTS):
+        response = await test_client.get(base_url)
+        assert response.status_code == 200
+
+    assert current_rss() - rss_before < MAX_RSS_GROWTH_IN_BYTES
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.cache import base as cache_base
+from db.uow import SqlModelUnitOfWork
+from services.base import ServiceBase
+from tests.test_api.conftest import engine
+
+pytestmark = pytest.mark.anyio
+
+
+def create_service() -> ServiceBase:
+    assert cache_base.cache is not None
+    # Loaders below don't use the session
+    uow = SqlModelUnitOfWork(session=AsyncSession(engine))
+    return ServiceBase(cache=cache_base.cache, uow=uow)
+
+
+async def test_concurrent_misses_load_once(
+    test_client: AsyncClient, test_db, monkeypatch
+):
+    service = create_service()
+    loads = 0
+    checks = 0
+
+    async def recently_written(tags):
+        nonlocal checks
+        checks += 1
+        # Round trip to Redis
+        await asyncio.sleep(0.01)
+        return True
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return b"value"
+
+    monkeypatch.setattr(service.cache, "recently_written", recently_written)
+    key = f"single-flight-{uuid.uuid4()}"
+    values = await asyncio.gather(
+        *(service.get_cached(key, loader, tags=["menus"]) for _ in range(10))
+    )
+    assert values == [b"value"] * 10
+    assert loads == 1
+    assert checks == 1
+    assert service.uow.pinned
+    assert not ServiceBase._in_flight
+
+
+async def test_waiter_loads_after_loader_is_cancelled(
+    test_client: AsyncClient, test_db
+):
+    service = create_service()
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return b"value"
+
+    key = f"single-flight-{uuid.uuid4()}"
+    loading = asyncio.create_task(service.get_cached(key, loader))
+    await asyncio.sleep(0.01)
+    waiting = asyncio.create_task(service.get_cached(key, loader))
+    await asyncio.sleep(0.01)
+    loading.cancel()
+
+    assert await waiting == b"value"
+    assert loads == 2
+    with pytest.raises(asyncio.CancelledError):
+        await loading
@@ -49,6 +49,19 @@ async def test_submenu_create(test_client: AsyncClient, menu_id):
     assert isinstance(UUID(response_dict["id"]), UUID)
 
 
+async def test_submenu_create_invalid(test_client: AsyncClient, menu_id):
+    base_url = app.url_path_for("create_submenu", menu_id=menu_id[:-5] + "1" * 5)
+    new_submenu = {
+        "title": "My submenu 1",
+        "description": "My submenu description 1",
+    }
+    response = await test_client.post(base_url, json=new_submenu)
+    assert response.status_code == 404
+
+    response = await test_client.get(app.url_path_for("get_menu", menu_id=menu_id))
+    assert response.json()["submenus_count"] == 0
+
+
 async def test_detailed_submenu(test_client: AsyncClient, menu_id):
     base_url = app.url_path_for("create_submenu", menu_id=menu_id)
     new_submenu = {
@@ -196,3 +209,65 @@ async def test_patch_submenu_invalid(test_client: AsyncClient, menu_id):
     }
     response = await test_client.patch(url, json=updated_submenu)
     assert response.status_code == 404
+
+
+async def test_delete_menu_invalidates_submenus(test_client: AsyncClient, menu_id):
+    base_url = app.url_path_for("create_submenu", menu_id=menu_id)
+    new_submenu = {
+        "title": "My submenu 1",
+        "description": "My submenu description 1",
+    }
+    response = await test_client.post(base_url, json=new_submenu)
+    submenu_id = response.json()["id"]
+    url = app.url_path_for("get_submenu", menu_id=menu_id, submenu_id=submenu_id)
+    # Cache submenu detail
+    response = await test_client.get(url)
+    assert response.status_code == 200
+
+    await test_client.delete(app.url_path_for("delete_menu", menu_id=menu_id))
+
+    response = await test_client.get(url)
+    assert response.status_code == 404
+
+
+async def test_submenu_batch(test_client: AsyncClient, menu_id):
+    base_url = app.url_path_for("create_submenu_batch", menu_id=menu_id)
+    new_submenus = [
+        {
+            "title": f"My submenu {number}",
+            "description": f"My submenu description {number}",
+        }
+        for number in range(2)
+    ]
+    response = await test_client.post(base_url, json=new_submenus)
+    assert response.status_code == 201
+    assert [submenu["dishes_count"] for submenu in response.json()] == [0, 0]
+    submenu_ids = [submenu["id"] for submenu in response.json()]
+
+    dishes_url = app.url_path_for(
+        "create_dish_batch", menu_id=menu_id, submenu_id=submenu_ids[0]
+    )
+    new_dish = {
+        "title": "My dish 1",
+        "description": "My dish description 1",
+        "price": 12.50,
+    }
+    await test_client.post(dishes_url, json=[new_dish, new_dish])
+
+    updated_submenus = [{"id": submenu_ids[1], "title": "updated My submenu 1"}]
+    response = await test_client.patch(base_url, json=updated_submenus)
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "updated My submenu 1"
+    assert response.json()[0]["description"] == "My submenu description 1"
+    assert response.json()[0]["dishes_count"] == 0
+
+    menu_url = app.url_path_for("get_menu", menu_id=menu_id)
+    response = await test_client.get(menu_url)
+    assert response.json()["submenus_count"] == 2
+    assert response.json()["dishes_count"] == 2
+
+    response = await test_client.request("DELETE", base_url, json=submenu_ids)
+    assert response.status_code == 200
+    response = await test_client.get(menu_url)
+    assert response.json()["submenus_count"] == 0
+    assert response.json()["dishes_count"] == 0
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from core.config import get_settings
+from db.cache import base as cache_base
+from db.cache.keys import MENUS_TAG
+from db.cache.TieredCache import CacheTiered, create_tiered_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_generations_are_kept_locally(
+    test_client: AsyncClient, test_db, monkeypatch
+):
+    cache = cache_base.cache
+    assert isinstance(cache, CacheTiered)
+    peer = create_tiered_cache(get_settings())
+    try:
+        # Both workers are subscribed, the peer holds the current generation
+        for _ in range(20):
+            ((_, subscribers),) = await cache.cache.cache.pubsub_numsub(cache.channel)
+            if subscribers == 2:
+                break
+            await asyncio.sleep(0.05)
+        (previous,) = await peer.get_generations([MENUS_TAG])
+
+        (generation,) = await cache.invalidate_tags([MENUS_TAG])
+        assert generation == previous + 1
+
+        async def no_redis(tags):
+            raise AssertionError(f"generations of {tags} are read from redis")
+
+        monkeypatch.setattr(cache.cache, "get_generations", no_redis)
+        monkeypatch.setattr(peer.cache, "get_generations", no_redis)
+        assert await cache.get_generations([MENUS_TAG]) == [generation]
+
+        # Applied by the peer listener
+        for _ in range(20):
+            if peer.local.get(peer.cache.generation_key(MENUS_TAG)) == generation:
+                break
+            await asyncio.sleep(0.05)
+        assert await peer.get_generations([MENUS_TAG]) == [generation]
+    finally:
+        await peer.close()